@@ -38,6 +38,8 @@ class Settings(BaseSettings):
     STT_MODEL: str = "base"
     FACE_TRACKING_MAX_VIOLATIONS: int = 7
     FACE_TRACKING_THRESHOLD: float = 30.0
+    MODEL_IDLE_TIMEOUT: Optional[float] = 600.0  # Seconds before idle OCR/STT models are unloaded (None = never)
+    OPENCV_THREADS: Optional[int] = 2  # OpenCV worker threads for face tracking (None = all cores)
     
     # Face Proctoring (These were causing errors!)
     FACE_YAW_THRESHOLD: float = 30.0
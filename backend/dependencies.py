@@ -28,7 +28,7 @@ def get_ocr_service() -> OCRService:
     """Get OCR service instance"""
     global _ocr_service
     if _ocr_service is None:
-        _ocr_service = OCRService()
+        _ocr_service = OCRService(idle_timeout=settings.MODEL_IDLE_TIMEOUT)
     return _ocr_service
 
 
@@ -44,7 +44,7 @@ def get_stt_service() -> STTService:
     """Get STT service instance"""
     global _stt_service
     if _stt_service is None:
-        _stt_service = STTService(model_size=settings.STT_MODEL)
+        _stt_service = STTService(model_size=settings.STT_MODEL, idle_timeout=settings.MODEL_IDLE_TIMEOUT)
     return _stt_service
 
 
@@ -57,7 +57,8 @@ def get_or_create_face_service(session_id: int) -> FaceTrackingService:
     if session_id not in _session_face_services:
         _session_face_services[session_id] = FaceTrackingService(
             yaw_threshold=30.0,  # Degrees of yaw before considering "looking away"
-            looking_away_duration=2.0  # Seconds before counting as violation
+            looking_away_duration=2.0,  # Seconds before counting as violation
+            frame_rate=1 / 3  # Frontend sends one proctoring frame every 3 seconds
         )
     return _session_face_services[session_id]
 
@@ -68,7 +69,7 @@ def cleanup_face_service(session_id: int):
     """
     global _session_face_services
     if session_id in _session_face_services:
-        del _session_face_services[session_id]
+        _session_face_services.pop(session_id).close()
 
 
 def get_face_tracking_service() -> FaceTrackingService:
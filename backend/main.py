@@ -58,6 +58,12 @@ async def startup_event():
     """Initialize services on startup"""
     logger.info("Starting Marco AI Interview Simulator...")
     
+    # Keep face tracking's OpenCV threads from competing with the server's workers
+    if settings.OPENCV_THREADS is not None:
+        import cv2
+        cv2.setNumThreads(settings.OPENCV_THREADS)
+        logger.info(f"OpenCV threads: {settings.OPENCV_THREADS}")
+    
     # Connect to database
     await db.connect()
     logger.info("Database connected")
@@ -5,6 +5,7 @@ Built from scratch with correct FaceMetrics variable names
 
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from pydantic import BaseModel
+import asyncio
 import numpy as np
 import cv2
 from typing import Dict, Optional
@@ -76,9 +77,9 @@ async def analyze_frame(
                 details={}
             )
         
-        # Process frame with FaceTrackingService
+        # Process frame with FaceTrackingService on its batch worker, without blocking the event loop
         # Returns FaceMetrics with: is_face_detected, head_pose, is_looking_away, confidence, violation_message
-        metrics = face_service.process_frame(img)
+        metrics = await asyncio.wrap_future(face_service.submit(img))
         
         # Debug logging to see what's being detected
         logger.info(f"Session {session_id}: Frame processed - Face: {metrics.is_face_detected}, "
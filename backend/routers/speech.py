@@ -5,6 +5,7 @@ Speech Router - Handle TTS and STT operations
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
+import asyncio
 import tempfile
 from pathlib import Path
 import shutil
@@ -41,16 +42,14 @@ async def text_to_speech(
 ):
     """Convert text to speech"""
     try:
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-        temp_path = temp_file.name
-        temp_file.close()
-        
-        # Generate speech
-        success = tts_service.save_to_file(request.text, temp_path)
+        # Generate speech on the TTS worker, which batches concurrent requests,
+        # without blocking the event loop
+        audio = await asyncio.wrap_future(tts_service.submit(request.text))
         
-        if not success:
-            raise HTTPException(status_code=500, detail="TTS generation failed")
+        # Create temporary file
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+            temp_file.write(audio)
+            temp_path = temp_file.name
         
         return TTSResponse(
             audio_file=temp_path,
@@ -90,14 +89,13 @@ async def speech_to_text(
         with open(temp_path, 'wb') as buffer:
             shutil.copyfileobj(audio.file, buffer)
         
-        # Transcribe
-        transcribed_text = stt_service.transcribe_audio_file(temp_path)
+        # Transcribe and score in a single Whisper run
+        transcribed_text, confidence = stt_service.transcribe_with_confidence(temp_path)
         
         if not transcribed_text:
             raise HTTPException(status_code=500, detail="Transcription failed")
         
-        # Get confidence score
-        confidence = stt_service.get_confidence_score(temp_path) or 0.0
+        confidence = confidence or 0.0
         
         # Cleanup
         Path(temp_path).unlink()
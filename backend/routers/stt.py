@@ -96,7 +96,7 @@ async def health_check():
         return JSONResponse({
             "status": "healthy",
             "model": service.model_size if service else None,
-            "whisper_available": service.has_whisper if service else False
+            "whisper_available": (service.has_whisper or service.has_faster_whisper) if service else False
         })
     except Exception as e:
         return JSONResponse({
@@ -0,0 +1,82 @@
+"""
+Compute device helpers shared by the ML-backed services (OCR, STT).
+"""
+
+import gc
+import threading
+from typing import Callable, List, Optional
+
+
+def detect_available_devices() -> List[str]:
+    """
+    Detect available torch compute devices.
+
+    Returns:
+        Device names ordered by preference, e.g. ['cuda', 'cpu'].
+        Always ends with 'cpu'.
+    """
+    devices = []
+
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            devices.append('cuda')
+
+        mps = getattr(torch.backends, 'mps', None)
+        if mps is not None and mps.is_available():
+            devices.append('mps')
+    except ImportError:
+        pass
+
+    devices.append('cpu')
+    return devices
+
+
+def select_device() -> str:
+    """Return the preferred compute device name."""
+    return detect_available_devices()[0]
+
+
+def release_device_memory():
+    """Collect garbage and return cached GPU memory to the driver."""
+    gc.collect()
+
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+class IdleTimer:
+    """Calls a function once no activity has been reported for a number of seconds."""
+
+    def __init__(self, timeout: float, callback: Callable[[], None]):
+        """
+        Args:
+            timeout: Idle seconds before the callback runs
+            callback: Function to call on expiry (from a timer thread)
+        """
+        self.timeout = timeout
+        self.callback = callback
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def touch(self):
+        """Report activity, restarting the countdown."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.timeout, self.callback)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        """Stop the countdown without calling the callback."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
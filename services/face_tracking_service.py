@@ -4,12 +4,21 @@ Uses HeadPoseDetector for real-time face detection and gaze tracking
 """
 import numpy as np
 import cv2
+from concurrent.futures import Future
 from typing import Dict, Optional
 from pathlib import Path
 import logging
+import queue
+import threading
+import time
 
 from .headpose_detection import HeadPoseDetector
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,20 +40,30 @@ class FaceTrackingService:
     Wraps HeadPoseDetector for integration with backend.
     """
     
-    def __init__(self, yaw_threshold: float = 30.0, looking_away_duration: float = 2.0):
+    def __init__(self, yaw_threshold: float = 30.0, looking_away_duration: float = 2.0,
+                 frame_rate: float = 30.0):
         """
         Initialize face tracking service.
         
         Args:
             yaw_threshold: Yaw angle threshold for "looking away" detection
             looking_away_duration: Time in seconds before counting as violation
+            frame_rate: Rate (frames per second) at which frames are submitted
         """
         self.detector = HeadPoseDetector(
             model_dir="models",
             yaw_threshold=yaw_threshold,
-            looking_away_duration=looking_away_duration
+            looking_away_duration=looking_away_duration,
+            fps=frame_rate
         )
         self.violation_count = 0
+        
+        # Frames are analyzed on the shared batch worker, batched with other sessions' frames
+        self._lock = threading.Lock()
+        self._closed = False
+        self._latest_metrics = FaceMetrics()
+        self._last_hash: Optional[int] = None
+        
         logger.info(f"FaceTrackingService initialized with yaw_threshold={yaw_threshold}, "
                    f"looking_away_duration={looking_away_duration}")
     
@@ -56,11 +75,59 @@ class FaceTrackingService:
             frame: Input video frame (BGR format from OpenCV)
             
         Returns:
-            FaceMetrics object with detection results
+            FaceMetrics object with tracking results for this frame
+        """
+        return self.submit(frame).result()
+    
+    def submit(self, frame: np.ndarray) -> Future:
+        """
+        Queue a video frame for face tracking without blocking on analysis.
+        Async callers can await it with asyncio.wrap_future().
+        
+        Args:
+            frame: Input video frame (BGR format from OpenCV)
+            
+        Returns:
+            Future resolving to the FaceMetrics for this frame
         """
+        future = Future()
+        frame_hash = _frame_hash(frame)
+        
+        with self._lock:
+            if self._closed:
+                future.set_result(_error_metrics(RuntimeError("Face tracking service closed")))
+                return future
+            
+            # Identical frame (e.g. idle candidate): reuse the cached result, unless a
+            # looking-away streak is running, since every frame advances that counter
+            if frame_hash == self._last_hash and not self._latest_metrics.is_looking_away:
+                future.set_result(self._latest_metrics)
+                return future
+        
+        _get_batch_worker().submit(self, frame, frame_hash, future)
+        return future
+    
+    def _complete_frame(self, frame: np.ndarray, frame_hash: int, face_result, future: Future):
+        """Finish analysis of a frame once the batch worker has detected faces."""
+        metrics = self._analyze_frame(frame, face_result)
+        with self._lock:
+            self._latest_metrics = metrics
+            self._last_hash = frame_hash
+        future.set_result(metrics)
+    
+    def _fail_frame(self, error: Exception, future: Future):
+        """Record a failed analysis for a submitted frame."""
+        metrics = _error_metrics(error)
+        with self._lock:
+            self._latest_metrics = metrics
+            self._last_hash = None
+        future.set_result(metrics)
+    
+    def _analyze_frame(self, frame: np.ndarray, face_result) -> FaceMetrics:
+        """Run HeadPoseDetector on a frame with a known detection and build FaceMetrics."""
         try:
             # Process frame with HeadPoseDetector
-            _, status = self.detector.process_frame(frame)
+            _, status = self.detector.process_detection(frame, face_result)
             
             # Extract metrics
             is_face_detected = status.get('face_detected', False)
@@ -78,7 +145,8 @@ class FaceTrackingService:
                 violation_message = "Multiple faces detected"
             elif is_looking_away:
                 violation_message = f"Looking away (yaw: {yaw:.1f}°)"
-                self.violation_count = self.detector.total_violations
+                with self._lock:
+                    self.violation_count = self.detector.total_violations
             
             # Confidence (approximate based on face detection)
             confidence = 0.9 if is_face_detected else 0.0
@@ -93,20 +161,120 @@ class FaceTrackingService:
             
         except Exception as e:
             logger.error(f"Error processing frame: {e}")
-            return FaceMetrics(
-                is_face_detected=False,
-                is_looking_away=False,
-                head_pose=(0.0, 0.0, 0.0),
-                confidence=0.0,
-                violation_message=f"Processing error: {str(e)}"
-            )
+            return _error_metrics(e)
     
     def reset(self):
         """Reset violation counters"""
-        self.violation_count = 0
-        self.detector.total_violations = 0
-        self.detector.looking_away_start_time = None
+        with self._lock:
+            self.violation_count = 0
+            self.detector.total_violations = 0
+            self.detector._away_frames = 0
+            self._latest_metrics = FaceMetrics()
+            self._last_hash = None
         logger.info("Face tracking service reset")
+    
+    def close(self):
+        """Stop accepting frames for this service."""
+        with self._lock:
+            self._closed = True
+
+
+def _frame_hash(frame: np.ndarray) -> int:
+    """Cheap 64-bit fingerprint of a downsampled frame."""
+    data = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA).tobytes()
+    if xxhash is not None:
+        return xxhash.xxh3_64(data).intdigest()
+    return hash(data)
+
+
+def _error_metrics(error: Exception) -> FaceMetrics:
+    """Build FaceMetrics reporting a processing error."""
+    return FaceMetrics(
+        is_face_detected=False,
+        is_looking_away=False,
+        head_pose=(0.0, 0.0, 0.0),
+        confidence=0.0,
+        violation_message=f"Processing error: {str(error)}"
+    )
+
+
+class _FaceBatchWorker:
+    """
+    Background worker shared by all FaceTrackingService instances.
+    Drains pending frames from every session and runs face detection
+    for them in a single batched DNN forward pass.
+    """
+    
+    def __init__(self, max_batch: int = 8, batch_window: float = 0.005):
+        """
+        Args:
+            max_batch: Maximum number of frames per forward pass
+            batch_window: Seconds to wait for more frames after the first arrives
+        """
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._in_q: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="face-tracking-worker", daemon=True)
+        self._thread.start()
+    
+    def submit(self, service: FaceTrackingService, frame: np.ndarray, frame_hash: int, future: Future):
+        """Queue a frame for the given service; its FaceMetrics are set on future."""
+        self._in_q.put((service, frame, frame_hash, future))
+    
+    def _next_batch(self) -> list:
+        """Block for one frame, then collect more until the batch is full or the window closes."""
+        batch = [self._in_q.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._in_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        """Worker loop."""
+        while True:
+            # Drop frames whose callers cancelled them while queued (e.g. a disconnected client)
+            batch = [item for item in self._next_batch() if item[3].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            frames = [frame for _, frame, _, _ in batch]
+            
+            # All detectors load the same network, so any one can run the batch
+            try:
+                face_results = batch[0][0].detector.detect_faces_batch(frames)
+            except Exception as e:
+                logger.error(f"Error in batched face detection: {e}")
+                for service, _, _, future in batch:
+                    service._fail_frame(e, future)
+                continue
+            
+            # Dispatch per-frame results back to the owning services, in submission order
+            for (service, frame, frame_hash, future), face_result in zip(batch, face_results):
+                try:
+                    service._complete_frame(frame, frame_hash, face_result, future)
+                except Exception as e:
+                    # One bad frame must not end the loop every session depends on
+                    logger.error(f"Error analyzing frame: {e}")
+                    if not future.done():
+                        service._fail_frame(e, future)
+
+
+_batch_worker: Optional[_FaceBatchWorker] = None
+_batch_worker_lock = threading.Lock()
+
+
+def _get_batch_worker() -> _FaceBatchWorker:
+    """Get or create the shared batch worker"""
+    global _batch_worker
+    with _batch_worker_lock:
+        if _batch_worker is None:
+            _batch_worker = _FaceBatchWorker()
+    return _batch_worker
 
 
 # Singleton instance management
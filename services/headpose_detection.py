@@ -11,10 +11,21 @@ REQUIRED MODELS:
    - shape_predictor_68_face_landmarks.dat: http://dlib.net/files/shape_predictor_68_face_landmarks.dat.bz2
    (Extract the .bz2 file to get the .dat file)
 
+3. (Optional) PFLD 68-point landmark model, INT8-quantized ONNX:
+   - pfld_int8.onnx (112x112 input, normalized landmark output)
+   When present (and onnxruntime is installed) it replaces the dlib predictor.
+
 Place all model files in: d:/aii final/services/models/
 
 INSTALLATION:
 pip install opencv-python dlib numpy
+pip install onnxruntime  # optional, for the PFLD landmark model
+
+THREADING:
+OpenCV and dlib/OpenMP default to all cores, which competes with the web
+server's worker processes. The backend caps OpenCV via the OPENCV_THREADS
+setting; OMP_NUM_THREADS is process-wide (it also caps torch), so set it
+in the deployment environment if needed.
 
 USAGE:
 python services/headpose_detection.py
@@ -23,10 +34,16 @@ python services/headpose_detection.py
 import cv2
 import numpy as np
 import dlib
+import math
 import time
 from pathlib import Path
 from typing import Tuple, Optional, List
 
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
 
 class HeadPoseDetector:
     """Real-time head pose detection for face proctoring."""
@@ -34,7 +51,8 @@ class HeadPoseDetector:
     def __init__(self, 
                  model_dir: str = "models",
                  yaw_threshold: float = 30.0,
-                 looking_away_duration: float = 2.0):
+                 looking_away_duration: float = 2.0,
+                 fps: float = 30.0):
         """
         Initialize head pose detector.
         
@@ -42,13 +60,15 @@ class HeadPoseDetector:
             model_dir: Directory containing model files
             yaw_threshold: Yaw angle threshold for "looking away" detection
             looking_away_duration: Time in seconds before warning
+            fps: Expected frame rate, used to turn looking-away frame counts into seconds
         """
         self.model_dir = Path(__file__).parent / model_dir
         self.yaw_threshold = yaw_threshold
         self.looking_away_duration = looking_away_duration
+        self.fps_estimate = fps
         
-        # Tracking variables
-        self.looking_away_start_time = None
+        # Tracking variables (consecutive looking-away frames instead of wall-clock time)
+        self._away_frames = 0
         self.total_violations = 0
         
         # Load models
@@ -62,7 +82,11 @@ class HeadPoseDetector:
             (225.0, 170.0, -135.0),      # Right eye right corner
             (-150.0, -150.0, -125.0),    # Left mouth corner
             (150.0, -150.0, -125.0)      # Right mouth corner
-        ], dtype=np.float64)
+        ], dtype=np.float32)
+        
+        # Camera matrices cached per frame size; no lens distortion assumed
+        self._camera_matrices = {}
+        self._dist_coeffs = np.zeros((4, 1), dtype=np.float32)
         
         # Landmark indices for the 68-point model
         self.landmark_indices = [30, 8, 36, 45, 48, 54]  # Nose, Chin, Eyes, Mouth corners
@@ -73,6 +97,8 @@ class HeadPoseDetector:
         prototxt_path = self.model_dir / "deploy.prototxt"
         caffemodel_path = self.model_dir / "res10_300x300_ssd_iter_140000.caffemodel"
         landmark_path = self.model_dir / "shape_predictor_68_face_landmarks.dat"
+        pfld_path = self.model_dir / "pfld_int8.onnx"
+        use_pfld = pfld_path.exists() and ort is not None
         
         # Check if model files exist
         if not prototxt_path.exists():
@@ -87,7 +113,7 @@ class HeadPoseDetector:
                 "Download from: https://github.com/opencv/opencv_3rdparty/raw/dnn_samples_face_detector_20170830/res10_300x300_ssd_iter_140000.caffemodel"
             )
         
-        if not landmark_path.exists():
+        if not use_pfld and not landmark_path.exists():
             raise FileNotFoundError(
                 f"Landmark predictor not found at {landmark_path}\n"
                 "Download from: http://dlib.net/files/shape_predictor_68_face_landmarks.dat.bz2\n"
@@ -98,9 +124,20 @@ class HeadPoseDetector:
         print("[INFO] Loading face detector...")
         self.face_net = cv2.dnn.readNetFromCaffe(str(prototxt_path), str(caffemodel_path))
         
-        # Load dlib landmark predictor
-        print("[INFO] Loading facial landmark predictor...")
-        self.landmark_predictor = dlib.shape_predictor(str(landmark_path))
+        # Load landmark predictor (PFLD via onnxruntime if available, else dlib)
+        self.landmark_session = None
+        self.landmark_predictor = None
+        if use_pfld:
+            print("[INFO] Loading PFLD landmark model (onnxruntime)...")
+            sess_options = ort.SessionOptions()
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.landmark_session = ort.InferenceSession(
+                str(pfld_path), sess_options, providers=['CPUExecutionProvider']
+            )
+            self.landmark_input_name = self.landmark_session.get_inputs()[0].name
+        else:
+            print("[INFO] Loading facial landmark predictor...")
+            self.landmark_predictor = dlib.shape_predictor(str(landmark_path))
         
         print("[SUCCESS] All models loaded successfully!")
     
@@ -129,42 +166,67 @@ class HeadPoseDetector:
         self.face_net.setInput(blob)
         detections = self.face_net.forward()
         
-        # Find faces with confidence > threshold
-        faces = []
-        for i in range(detections.shape[2]):
-            confidence = detections[0, 0, i, 2]
+        return self._select_face(detections[0, 0], w, h, confidence_threshold)
+    
+    def detect_faces_batch(self, frames: List[np.ndarray], confidence_threshold: float = 0.5) -> list:
+        """
+        Detect faces in several frames with a single batched DNN forward pass.
+        
+        Args:
+            frames: Input image frames
+            confidence_threshold: Minimum confidence for detection
             
-            if confidence > confidence_threshold:
-                box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                (x1, y1, x2, y2) = box.astype("int")
-                
-                # Convert to (x, y, w, h) format
-                x = x1
-                y = y1
-                width = x2 - x1
-                height = y2 - y1
-                
-                faces.append((x, y, width, height, confidence))
+        Returns:
+            List with one detect_face() result per input frame
+        """
+        blob = cv2.dnn.blobFromImages(
+            [cv2.resize(frame, (300, 300)) for frame in frames],
+            1.0,
+            (300, 300),
+            (104.0, 177.0, 123.0)
+        )
         
+        self.face_net.setInput(blob)
+        dets = self.face_net.forward()[0, 0]
+        
+        # Detections of all images share one output; column 0 holds the image index
+        results = []
+        for i, frame in enumerate(frames):
+            h, w = frame.shape[:2]
+            results.append(self._select_face(dets[dets[:, 0] == i], w, h, confidence_threshold))
+        return results
+    
+    def _select_face(self, dets: np.ndarray, w: int, h: int, confidence_threshold: float):
+        """Reduce SSD detections (K x 7) to a single face box, "multiple" or None."""
+        # Filter all detections with confidence > threshold in one pass
+        mask = dets[:, 2] > confidence_threshold
+        boxes = (dets[mask, 3:7] * np.array([w, h, w, h])).astype(np.int32)
+
         # Return None if no face or multiple faces
-        if len(faces) == 0:
+        n = boxes.shape[0]
+        if n == 0:
             return None
-        elif len(faces) > 1:
+        elif n > 1:
             return "multiple"
-        else:
-            return faces[0][:4]  # Return (x, y, w, h)
+
+        # Convert to (x, y, w, h) format
+        x1, y1, x2, y2 = boxes[0].tolist()
+        return (x1, y1, x2 - x1, y2 - y1)
     
     def get_landmarks(self, frame: np.ndarray, face_rect: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
         """
-        Get facial landmarks using dlib.
+        Get facial landmarks using PFLD (onnxruntime) or dlib.
         
         Args:
-            frame: Input image frame
+            frame: Input image frame (grayscale is accepted and preferred for dlib)
             face_rect: Face bounding box (x, y, w, h)
             
         Returns:
             Array of 2D landmark points for selected indices
         """
+        if self.landmark_session is not None:
+            return self._get_landmarks_pfld(frame, face_rect)
+        
         x, y, w, h = face_rect
         
         # Convert to dlib rectangle
@@ -179,7 +241,31 @@ class HeadPoseDetector:
             point = shape.part(idx)
             landmarks.append([point.x, point.y])
         
-        return np.array(landmarks, dtype=np.float64)
+        return np.array(landmarks, dtype=np.float32)
+    
+    def _get_landmarks_pfld(self, frame: np.ndarray, face_rect: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        """Get facial landmarks with the PFLD ONNX model."""
+        x, y, w, h = face_rect
+        frame_h, frame_w = frame.shape[:2]
+        
+        # Clip face rect to the frame
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + w, frame_w), min(y + h, frame_h)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        
+        # Crop, resize to 112x112, normalize to [-1, 1] in NCHW layout
+        crop = cv2.resize(frame[y1:y2, x1:x2], (112, 112))
+        crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        blob = (crop.astype(np.float32) / 127.5 - 1.0).transpose(2, 0, 1)[np.newaxis]
+        
+        output = self.landmark_session.run(None, {self.landmark_input_name: blob})[0]
+        
+        # Unscale normalized outputs back into frame coordinates
+        points = output.reshape(-1, 2)[self.landmark_indices]
+        points = points * np.array([x2 - x1, y2 - y1]) + np.array([x1, y1])
+        
+        return points.astype(np.float32)
     
     def estimate_head_pose(self, landmarks: np.ndarray, frame_shape: Tuple[int, int]) -> Tuple[float, float, float]:
         """
@@ -195,23 +281,23 @@ class HeadPoseDetector:
         h, w = frame_shape[:2]
         
         # Camera internals (approximate)
-        focal_length = w
-        center = (w / 2, h / 2)
-        camera_matrix = np.array([
-            [focal_length, 0, center[0]],
-            [0, focal_length, center[1]],
-            [0, 0, 1]
-        ], dtype=np.float64)
-        
-        # Assume no lens distortion
-        dist_coeffs = np.zeros((4, 1))
+        camera_matrix = self._camera_matrices.get((h, w))
+        if camera_matrix is None:
+            focal_length = w
+            center = (w / 2, h / 2)
+            camera_matrix = np.array([
+                [focal_length, 0, center[0]],
+                [0, focal_length, center[1]],
+                [0, 0, 1]
+            ], dtype=np.float32)
+            self._camera_matrices[(h, w)] = camera_matrix
         
         # Solve PnP
         success, rotation_vector, translation_vector = cv2.solvePnP(
             self.model_points,
             landmarks,
             camera_matrix,
-            dist_coeffs,
+            self._dist_coeffs,
             flags=cv2.SOLVEPNP_ITERATIVE
         )
         
@@ -221,32 +307,24 @@ class HeadPoseDetector:
         # Convert rotation vector to rotation matrix
         rotation_matrix, _ = cv2.Rodrigues(rotation_vector)
         
-        # Calculate Euler angles
-        pitch, yaw, roll = self._rotation_matrix_to_euler_angles(rotation_matrix)
-        
-        # Convert to degrees
-        pitch = np.degrees(pitch)
-        yaw = np.degrees(yaw)
-        roll = np.degrees(roll)
-        
-        return (pitch, yaw, roll)
+        # Calculate Euler angles in degrees
+        return self._rotation_matrix_to_euler_angles(rotation_matrix)
     
     def _rotation_matrix_to_euler_angles(self, R: np.ndarray) -> Tuple[float, float, float]:
-        """Convert rotation matrix to Euler angles."""
-        sy = np.sqrt(R[0, 0] * R[0, 0] + R[1, 0] * R[1, 0])
-        
-        singular = sy < 1e-6
-        
-        if not singular:
-            x = np.arctan2(R[2, 1], R[2, 2])
-            y = np.arctan2(-R[2, 0], sy)
-            z = np.arctan2(R[1, 0], R[0, 0])
+        """Convert rotation matrix to Euler angles (pitch, yaw, roll) in degrees."""
+        # Unpack once into Python floats; scalar math avoids per-element NumPy dispatch
+        r00, _, _, r10, r11, r12, r20, r21, r22 = R.ravel().tolist()
+        sy = math.hypot(r00, r10)
+        
+        if sy >= 1e-6:
+            x = math.atan2(r21, r22)
+            z = math.atan2(r10, r00)
         else:
-            x = np.arctan2(-R[1, 2], R[1, 1])
-            y = np.arctan2(-R[2, 0], sy)
-            z = 0
+            x = math.atan2(-r12, r11)
+            z = 0.0
+        y = math.atan2(-r20, sy)
         
-        return (x, y, z)
+        return (math.degrees(x), math.degrees(y), math.degrees(z))
     
     def draw_annotations(self, frame: np.ndarray, face_rect: Tuple[int, int, int, int], 
                         landmarks: np.ndarray, pose: Tuple[float, float, float]) -> np.ndarray:
@@ -305,6 +383,19 @@ class HeadPoseDetector:
         Args:
             frame: Input video frame
             
+        Returns:
+            Tuple of (annotated_frame, status_dict)
+        """
+        return self.process_detection(frame, self.detect_face(frame))
+    
+    def process_detection(self, frame: np.ndarray, face_result) -> Tuple[np.ndarray, dict]:
+        """
+        Process a frame whose face detection result is already known.
+        
+        Args:
+            frame: Input video frame
+            face_result: Result of detect_face() / detect_faces_batch() for this frame
+            
         Returns:
             Tuple of (annotated_frame, status_dict)
         """
@@ -318,14 +409,11 @@ class HeadPoseDetector:
             'warning': None
         }
         
-        # Detect face
-        face_result = self.detect_face(frame)
-        
         if face_result is None:
             # No face detected
             cv2.putText(frame, "Face Not Detected", (10, 30), 
                        cv2.FONT_HERSHEY_DUPLEX, 1.0, (0, 0, 255), 2)
-            self.looking_away_start_time = None
+            self._away_frames = 0
             return frame, status
         
         elif face_result == "multiple":
@@ -333,15 +421,20 @@ class HeadPoseDetector:
             status['multiple_faces'] = True
             cv2.putText(frame, "Multiple Faces Detected", (10, 30), 
                        cv2.FONT_HERSHEY_DUPLEX, 1.0, (0, 165, 255), 2)
-            self.looking_away_start_time = None
+            self._away_frames = 0
             return frame, status
         
         # Single face detected
         status['face_detected'] = True
         face_rect = face_result
         
-        # Get landmarks
-        landmarks = self.get_landmarks(frame, face_rect)
+        # Get landmarks (dlib runs on grayscale directly, skipping its own conversion;
+        # PFLD needs the color frame)
+        if self.landmark_session is not None:
+            landmark_image = frame
+        else:
+            landmark_image = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        landmarks = self.get_landmarks(landmark_image, face_rect)
         if landmarks is None:
             return frame, status
         
@@ -355,18 +448,17 @@ class HeadPoseDetector:
         if abs(yaw) > self.yaw_threshold:
             status['looking_away'] = True
             
-            # Track duration
-            if self.looking_away_start_time is None:
-                self.looking_away_start_time = time.time()
-            else:
-                duration = time.time() - self.looking_away_start_time
+            # Track duration from the number of frames since looking away started
+            if self._away_frames > 0:
+                duration = self._away_frames / self.fps_estimate
                 if duration > self.looking_away_duration:
                     self.total_violations += 1
                     warning_msg = f"[WARNING] Looking away for {duration:.1f}s! Total violations: {self.total_violations}"
                     print(warning_msg)
                     status['warning'] = warning_msg
+            self._away_frames += 1
         else:
-            self.looking_away_start_time = None
+            self._away_frames = 0
         
         # Draw annotations
         annotated_frame = self.draw_annotations(frame, face_rect, landmarks, (pitch, yaw, roll))
@@ -405,7 +497,7 @@ def main():
         print("=" * 70)
         
         # FPS calculation
-        fps_start_time = time.time()
+        fps_start_time = time.monotonic()
         fps_frame_count = 0
         fps = 0
         
@@ -421,10 +513,13 @@ def main():
             # Calculate FPS
             fps_frame_count += 1
             if fps_frame_count >= 30:
-                fps_end_time = time.time()
+                fps_end_time = time.monotonic()
                 fps = fps_frame_count / (fps_end_time - fps_start_time)
                 fps_start_time = fps_end_time
                 fps_frame_count = 0
+                
+                # Keep the looking-away frame counter calibrated to the real frame rate
+                detector.fps_estimate = fps
             
             # Display FPS
             cv2.putText(annotated_frame, f"FPS: {fps:.1f}", (10, annotated_frame.shape[0] - 10), 
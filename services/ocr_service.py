@@ -3,16 +3,122 @@ OCR Service for Marco AI Interview Simulator
 Extracts text from PDF and DOCX resume files with OCR support for scanned documents.
 """
 
+import copy
+import hashlib
+import mmap
+import multiprocessing
 import os
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 import logging
 
+try:
+    import re2  # Linear-time (DFA) matching for the contact patterns
+except ImportError:
+    re2 = re
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    from ._device import IdleTimer, release_device_memory, select_device
+except ImportError:  # Running as a standalone script
+    from _device import IdleTimer, release_device_memory, select_device
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Scanned pages are OCR'd together at a common size (portrait page aspect ratio)
+OCR_PAGE_WIDTH = 1600
+OCR_PAGE_HEIGHT = 2200
+OCR_BATCH_SIZE = 8
+
+# PDFs with at least this many pages have their text layer read in worker processes
+PARALLEL_TEXT_MIN_PAGES = 8
+
+# Number of parsed resumes kept in memory, keyed by file content hash
+_PARSE_CACHE_SIZE = 128
+
+# Common technical skills keywords (literal, matched on word boundaries)
+SKILL_KEYWORDS = [
+    # Programming languages
+    'python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'php', 'swift',
+    'kotlin', 'go', 'rust', 'typescript', 'scala', 'r',
+    # Web technologies
+    'html', 'css', 'react', 'angular', 'vue', 'node.js', 'express', 
+    'django', 'flask', 'fastapi', 'spring', 'asp.net',
+    # Databases
+    'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 
+    'sqlite', 'cassandra', 'dynamodb',
+    # Cloud & DevOps
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'git',
+    'ci/cd', 'terraform', 'ansible',
+    # AI/ML
+    'machine learning', 'deep learning', 'tensorflow', 'pytorch', 
+    'scikit-learn', 'nlp', 'computer vision', 'opencv',
+    # Other
+    'rest api', 'graphql', 'microservices', 'agile', 'scrum'
+]
+
+# Pre-compiled patterns used by resume parsing
+# All skills fused into one alternation so the text is scanned once
+# (used when pyahocorasick is not installed)
+_SKILLS_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, SKILL_KEYWORDS)) + r')\b', re.IGNORECASE)
+
+# Aho-Corasick automaton over the lowercase keywords (one DFA pass over the text)
+_SKILLS_AUTOMATON = None
+if ahocorasick is not None:
+    _SKILLS_AUTOMATON = ahocorasick.Automaton()
+    for _keyword in SKILL_KEYWORDS:
+        _SKILLS_AUTOMATON.add_word(_keyword, len(_keyword))
+    _SKILLS_AUTOMATON.make_automaton()
+
+_EMAIL_RE = re2.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+
+# Tried in order; the second also covers bare 10-digit numbers (2345678900)
+_PHONE_RES = [
+    re2.compile(r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'),  # +1-234-567-8900
+    re2.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}'),  # (234) 567-8900
+]
+
+# Common section headers, in priority order for lines matching several
+_SECTION_KEYWORDS = {
+    'education': r'education|academic|qualification',
+    'experience': r'experience|employment|work history',
+    'skills': r'skills|technical skills|competencies',
+    'projects': r'projects|portfolio',
+    'certifications': r'certifications|certificates'
+}
+
+# One named group per section; each match spans a whole header line
+_SECTION_RE = re.compile(
+    '|'.join(f'^(?P<{name}>.*(?:{keywords}).*)' for name, keywords in _SECTION_KEYWORDS.items()),
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Hyperscan database of the same section keywords (match id = position in _SECTION_NAMES)
+_SECTION_NAMES = list(_SECTION_KEYWORDS)
+_SECTION_DB = None
+if hyperscan is not None:
+    _SECTION_DB = hyperscan.Database()
+    _SECTION_DB.compile(
+        expressions=[keywords.encode() for keywords in _SECTION_KEYWORDS.values()],
+        ids=list(range(len(_SECTION_NAMES))),
+        flags=[hyperscan.HS_FLAG_CASELESS] * len(_SECTION_NAMES)
+    )
+
 
 class OCRService:
     """
@@ -20,40 +126,108 @@ class OCRService:
     Supports PDF, DOCX, and scanned documents via OCR.
     """
     
-    def __init__(self):
-        """Initialize OCR Service with required dependencies check."""
+    def __init__(self, dpi: int = 200, idle_timeout: Optional[float] = None, use_ocr: bool = True):
+        """
+        Initialize OCR Service with required dependencies check.
+        
+        Args:
+            dpi: Resolution used to rasterize scanned PDF pages for OCR (pages are
+                 then resized to OCR_PAGE_WIDTH x OCR_PAGE_HEIGHT for recognition)
+            idle_timeout: Seconds without OCR after which the EasyOCR models are
+                          unloaded (reloaded on next use); None keeps them loaded
+            use_ocr: Load EasyOCR for scanned pages; False extracts embedded text only
+        """
+        self.ocr_dpi = dpi
+        self.use_ocr = use_ocr
+        self._idle_timer = IdleTimer(idle_timeout, self.unload) if idle_timeout else None
         self._check_dependencies()
         self.supported_formats = ['.pdf', '.docx', '.doc']
         
+        # Recently parsed resumes keyed by (sha256, size, extension), least recent first
+        self._parse_cache: Dict[tuple, dict] = {}
+        
     def _check_dependencies(self):
         """Check if required libraries are available."""
         self.has_pdf = False
+        self.has_pdfium = False
+        self.has_fitz = False
         self.has_docx = False
         self.has_ocr = False
         self.ocr_reader = None
+        self.device = 'cpu'
         
         try:
             import pdfplumber
             self.has_pdf = True
         except ImportError:
-            logger.warning("pdfplumber not installed. PDF support disabled.")
+            logger.warning("pdfplumber not installed. Scanned PDF OCR disabled.")
+        
+        try:
+            import fitz
+            self.has_fitz = True
+            self.has_pdf = True
+        except ImportError:
+            pass  # Fall back to pypdfium2 / pdfplumber for the text layer
+        
+        try:
+            import pypdfium2
+            self.has_pdfium = True
+            self.has_pdf = True
+        except ImportError:
+            pass  # Fall back to pdfplumber for the text layer
+        
+        if not self.has_pdf:
+            logger.warning("No PDF library installed. PDF support disabled.")
             
         try:
             import docx
             self.has_docx = True
         except ImportError:
             logger.warning("python-docx not installed. DOCX support disabled.")
+        
             
+        if not self.use_ocr:
+            return
+        
         try:
-            import easyocr
-            self.ocr_reader = easyocr.Reader(['en'], gpu=False)  # CPU mode for compatibility
+            self._load_ocr_reader()
             self.has_ocr = True
-            logger.info("EasyOCR initialized successfully")
+            if self._idle_timer:
+                self._idle_timer.touch()
         except ImportError:
             logger.warning("easyocr not installed. OCR support disabled.")
         except Exception as e:
             logger.warning(f"EasyOCR initialization failed: {e}. OCR support disabled.")
     
+    def _load_ocr_reader(self):
+        """Create the EasyOCR reader on the preferred device, falling back to CPU."""
+        import easyocr
+        self.device = select_device()
+        try:
+            self.ocr_reader = easyocr.Reader(
+                ['en'], gpu=(self.device != 'cpu'), quantize=True, cudnn_benchmark=True
+            )
+        except Exception as e:
+            if self.device == 'cpu':
+                raise
+            logger.warning(f"EasyOCR on {self.device} failed: {e}. Falling back to CPU.")
+            self.device = 'cpu'
+            self.ocr_reader = easyocr.Reader(['en'], gpu=False, quantize=True)
+        logger.info(f"EasyOCR initialized successfully on {self.device}")
+        self._warmup_ocr()
+    
+    def unload(self):
+        """
+        Release the EasyOCR models and free their (GPU) memory.
+        They are reloaded automatically the next time a scanned page needs OCR.
+        """
+        if self._idle_timer:
+            self._idle_timer.cancel()
+        
+        self.ocr_reader = None
+        release_device_memory()
+        logger.info("EasyOCR models unloaded")
+    
     def extract_text(self, file_path: Union[str, Path]) -> str:
         """
         Extract text from a resume file.
@@ -87,29 +261,61 @@ class OCRService:
         else:
             raise ValueError(f"Format {file_ext} not implemented")
     
-    def _extract_from_pdf(self, file_path: Path) -> str:
-        """Extract text from PDF file."""
-        if not self.has_pdf:
-            raise RuntimeError("pdfplumber not installed. Install with: pip install pdfplumber")
+    def batch_extract(self, file_paths: List[Union[str, Path]], workers: Optional[int] = None) -> List[str]:
+        """
+        Extract text from several resume files in parallel.
+        
+        Embedded text is read in worker processes; pages that need OCR are then
+        recognized here with this service's (already loaded) EasyOCR reader.
+        
+        Args:
+            file_paths: Paths to resume files (PDF or DOCX)
+            workers: Maximum number of files extracted at once (default: CPU count)
+            
+        Returns:
+            Extracted text for each file, in order ("" for files that failed)
+        """
+        file_paths = [Path(path) for path in file_paths]
+        if not file_paths:
+            return []
         
-        import pdfplumber
+        # The process pool is shared, so cap this batch's files in flight instead of sizing it
+        results = _pool_extract_files(file_paths, max(1, workers or os.cpu_count() or 1))
         
-        text_content = []
+        texts = []
+        for path, extracted in zip(file_paths, results):
+            try:
+                if isinstance(extracted, Exception):
+                    raise extracted
+                if isinstance(extracted, list):
+                    # PDF page texts; OCR the pages without a text layer
+                    extracted = self._extract_from_pdf(path, extracted)
+                texts.append(extracted)
+            except Exception as e:
+                logger.error(f"Batch extraction failed for {path.name}: {e}")
+                texts.append("")
+        
+        return texts
+    
+    def _extract_from_pdf(self, file_path: Path, page_texts: Optional[List[str]] = None) -> str:
+        """Extract text from PDF file, optionally starting from an already-read text layer."""
+        if not self.has_pdf:
+            raise RuntimeError("No PDF library installed. Install with: pip install pymupdf pdfplumber")
         
         try:
-            with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    
-                    if page_text:
-                        text_content.append(page_text)
-                    else:
-                        # If no text found, try OCR
-                        logger.info(f"Page {page_num} has no extractable text, attempting OCR...")
-                        ocr_text = self._ocr_page(page)
-                        if ocr_text:
-                            text_content.append(ocr_text)
+            # Pass 1: text layer of every page
+            if page_texts is None:
+                page_texts = self._read_text_layer(file_path)
+            
+            # Pass 2: OCR all pages without extractable text in one batch
+            ocr_indices = [i for i, text in enumerate(page_texts) if not text]
+            if ocr_indices:
+                logger.info(f"Pages {[i + 1 for i in ocr_indices]} have no extractable text, attempting OCR...")
+                ocr_texts = self._ocr_pages(file_path, ocr_indices, self.ocr_dpi)
+                for i, ocr_text in zip(ocr_indices, ocr_texts):
+                    page_texts[i] = ocr_text
             
+            text_content = [text for text in page_texts if text]
             full_text = "\n\n".join(text_content)
             logger.info(f"Extracted {len(full_text)} characters from PDF")
             return full_text
@@ -118,6 +324,53 @@ class OCRService:
             logger.error(f"Error extracting PDF: {e}")
             raise RuntimeError(f"Failed to extract PDF: {e}")
     
+    def _read_text_layer(self, file_path: Path) -> List[str]:
+        """Return the embedded text of every PDF page ("" for pages without a text layer)."""
+        if self.has_fitz:
+            # MuPDF reads the content stream directly, without per-character layout objects
+            import fitz
+            
+            with fitz.open(file_path) as doc:
+                page_texts = [page.get_text("text") for page in doc]
+            return [text if text.strip() else "" for text in page_texts]
+        
+        if not self.has_pdfium:
+            import pdfplumber
+            
+            with pdfplumber.open(file_path) as pdf:
+                page_count = len(pdf.pages)
+                if page_count < PARALLEL_TEXT_MIN_PAGES:
+                    return [page.extract_text() or "" for page in pdf.pages]
+            
+            # pdfminer is pure Python and holds the GIL, so split long documents into
+            # page ranges read by separate processes, each with its own file handle
+            workers = max(1, min(page_count // 2, (os.cpu_count() or 2) // 2))
+            chunk = -(-page_count // workers)
+            starts = list(range(0, page_count, chunk))
+            chunks = _pool_map(
+                _extract_page_texts,
+                [file_path] * len(starts),
+                starts,
+                [start + chunk for start in starts]
+            )
+            return [text for texts in chunks for text in texts]
+        
+        # PDFium's native text extractor skips pdfplumber's per-character layout tree
+        import pypdfium2 as pdfium
+        
+        pdf = pdfium.PdfDocument(str(file_path))
+        try:
+            page_texts = []
+            for page in pdf:
+                textpage = page.get_textpage()
+                text = textpage.get_text_range().replace('\r\n', '\n')
+                page_texts.append(text if text.strip() else "")
+                textpage.close()
+                page.close()
+            return page_texts
+        finally:
+            pdf.close()
+    
     def _extract_from_docx(self, file_path: Path) -> str:
         """Extract text from DOCX file."""
         if not self.has_docx:
@@ -149,34 +402,67 @@ class OCRService:
             logger.error(f"Error extracting DOCX: {e}")
             raise RuntimeError(f"Failed to extract DOCX: {e}")
     
-    def _ocr_page(self, page) -> str:
-        """Perform OCR on a PDF page using EasyOCR."""
-        if not self.has_ocr or self.ocr_reader is None:
+    def _ocr_pages(self, file_path: Path, page_indices: List[int], dpi: int) -> List[str]:
+        """Perform batched OCR on PDF pages using EasyOCR."""
+        if not self.has_ocr:
             logger.warning("OCR not available. Install easyocr: pip install easyocr")
-            return ""
+            return [""] * len(page_indices)
+        
+        if self.ocr_reader is None:
+            try:
+                self._load_ocr_reader()
+            except Exception as e:
+                logger.error(f"Failed to reload EasyOCR: {e}")
+                return [""] * len(page_indices)
+        
+        if self._idle_timer:
+            self._idle_timer.touch()
         
         try:
-            from PIL import Image
-            import io
-            import numpy as np
+            # Convert pages to images (numpy arrays for EasyOCR); rasterization is
+            # CPU-bound and single-threaded per page, so spread it over processes
+            if len(page_indices) == 1:
+                images = [_rasterize_page(file_path, page_indices[0], dpi)]
+            else:
+                images = _pool_map(
+                    _rasterize_page,
+                    [file_path] * len(page_indices),
+                    page_indices,
+                    [dpi] * len(page_indices)
+                )
             
-            # Convert page to image
-            img = page.to_image(resolution=300)
-            pil_img = img.original
+            # Perform OCR; pages are resized to a common shape so they batch on the GPU
+            results = self.ocr_reader.readtext_batched(
+                images,
+                n_width=OCR_PAGE_WIDTH,
+                n_height=OCR_PAGE_HEIGHT,
+                batch_size=OCR_BATCH_SIZE
+            )
             
-            # Convert PIL image to numpy array for EasyOCR
-            img_array = np.array(pil_img)
+            # Extract text from results, one string per page
+            return [' '.join([result[1] for result in page_results]) for page_results in results]
             
-            # Perform OCR
-            results = self.ocr_reader.readtext(img_array)
+        except Exception as e:
+            logger.error(f"OCR failed: {e}")
+            return [""] * len(page_indices)
+    
+    def _warmup_ocr(self):
+        """Run a dummy inference so model init (and GPU kernel tuning) happens before the first request."""
+        try:
+            import numpy as np
             
-            # Extract text from results
-            text = ' '.join([result[1] for result in results])
-            return text
+            if self.device == 'cpu':
+                # Nothing to autotune; a tiny image is enough to initialize the models
+                self.ocr_reader.readtext(np.zeros((64, 64, 3), np.uint8))
+                return
             
+            # Tune GPU kernels for the batched page shape used by _ocr_pages
+            dummy = np.zeros((OCR_BATCH_SIZE, OCR_PAGE_HEIGHT, OCR_PAGE_WIDTH, 3), np.uint8)
+            self.ocr_reader.readtext_batched(
+                dummy, n_width=OCR_PAGE_WIDTH, n_height=OCR_PAGE_HEIGHT, batch_size=OCR_BATCH_SIZE
+            )
         except Exception as e:
-            logger.error(f"OCR failed: {e}")
-            return ""
+            logger.warning(f"EasyOCR warmup failed: {e}")
     
     def parse_resume(self, file_path: Union[str, Path]) -> Dict[str, any]:
         """
@@ -193,8 +479,49 @@ class OCRService:
             - phone: Extracted phone number
             - sections: Dictionary of identified sections
         """
-        text = self.extract_text(file_path)
+        file_path = Path(file_path)
+        
+        if not file_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        # Re-uploads of the same file skip OCR and parsing entirely
+        key = (_file_sha256(file_path), file_path.stat().st_size, file_path.suffix.lower())
+        if key in self._parse_cache:
+            parsed_data = self._parse_cache.pop(key)
+            self._parse_cache[key] = parsed_data
+            logger.info(f"Parsed resume: cache hit for {file_path.name}")
+            return copy.deepcopy(parsed_data)
+        
+        parsed_data = self.parse_resume_from_text(self.extract_text(file_path))
+        
+        self._parse_cache[key] = parsed_data
+        if len(self._parse_cache) > _PARSE_CACHE_SIZE:
+            del self._parse_cache[next(iter(self._parse_cache))]
+        return copy.deepcopy(parsed_data)
+    
+    def parse_resumes(self, file_paths: List[Union[str, Path]], workers: Optional[int] = None) -> List[Dict[str, any]]:
+        """
+        Extract and parse several resumes, extracting text in parallel via batch_extract().
+        
+        Args:
+            file_paths: Paths to resume files
+            workers: Number of extraction worker processes (default: CPU count)
+            
+        Returns:
+            Parsed resume data for each file, in order (fields are empty for files that failed)
+        """
+        return [self.parse_resume_from_text(text) for text in self.batch_extract(file_paths, workers)]
+    
+    def parse_resume_from_text(self, text: str) -> Dict[str, any]:
+        """
+        Parse resume information from already-extracted text.
         
+        Args:
+            text: Resume text, e.g. from extract_text()
+            
+        Returns:
+            Dictionary with the same fields as parse_resume()
+        """
         parsed_data = {
             'raw_text': text,
             'skills': self._extract_skills(text),
@@ -208,59 +535,19 @@ class OCRService:
     
     def _extract_skills(self, text: str) -> List[str]:
         """Extract technical skills from resume text."""
-        # Common technical skills keywords
-        skill_keywords = [
-            # Programming languages
-            'python', 'java', 'javascript', 'c\\+\\+', 'c#', 'ruby', 'php', 'swift',
-            'kotlin', 'go', 'rust', 'typescript', 'scala', 'r\\b',
-            # Web technologies
-            'html', 'css', 'react', 'angular', 'vue', 'node.js', 'express', 
-            'django', 'flask', 'fastapi', 'spring', 'asp.net',
-            # Databases
-            'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 
-            'sqlite', 'cassandra', 'dynamodb',
-            # Cloud & DevOps
-            'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'jenkins', 'git',
-            'ci/cd', 'terraform', 'ansible',
-            # AI/ML
-            'machine learning', 'deep learning', 'tensorflow', 'pytorch', 
-            'scikit-learn', 'nlp', 'computer vision', 'opencv',
-            # Other
-            'rest api', 'graphql', 'microservices', 'agile', 'scrum'
-        ]
-        
-        found_skills = []
-        text_lower = text.lower()
-        
-        for skill in skill_keywords:
-            # Use word boundary matching
-            pattern = r'\b' + skill + r'\b'
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                # Store original case version if found
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    found_skills.append(match.group())
-        
-        # Remove duplicates and return
-        return list(set(found_skills))
+        if _SKILLS_AUTOMATON is not None:
+            return _collect_skills(_automaton_skill_matches(text))
+        return _collect_skills(_regex_skill_matches(text))
     
     def _extract_email(self, text: str) -> Optional[str]:
         """Extract email address from text."""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        match = re.search(email_pattern, text)
+        match = _EMAIL_RE.search(text)
         return match.group() if match else None
     
     def _extract_phone(self, text: str) -> Optional[str]:
         """Extract phone number from text."""
-        # Pattern for common phone formats
-        phone_patterns = [
-            r'\+?\d{1,3}[-.\s]?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',  # +1-234-567-8900
-            r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}',  # (234) 567-8900
-            r'\d{10}',  # 2345678900
-        ]
-        
-        for pattern in phone_patterns:
-            match = re.search(pattern, text)
+        for pattern in _PHONE_RES:
+            match = pattern.search(text)
             if match:
                 return match.group()
         
@@ -270,29 +557,203 @@ class OCRService:
         """Identify common resume sections."""
         sections = {}
         
-        # Common section headers
-        section_patterns = {
-            'education': r'(?i)(education|academic|qualification)',
-            'experience': r'(?i)(experience|employment|work history)',
-            'skills': r'(?i)(skills|technical skills|competencies)',
-            'projects': r'(?i)(projects|portfolio)',
-            'certifications': r'(?i)(certifications|certificates)'
-        }
-        
-        lines = text.split('\n')
-        current_section = None
+        # Hyperscan matches bytes case-insensitively in ASCII only, so use it when
+        # byte offsets and case folding agree with the regex
+        if _SECTION_DB is not None and text.isascii():
+            # Lowest (highest-priority) section id matched on each line, by line start
+            line_sections = {}
+            
+            def on_match(section_id, start, end, flags, context):
+                line_start = text.rfind('\n', 0, end) + 1
+                line_sections[line_start] = min(section_id, line_sections.get(line_start, section_id))
+            
+            _SECTION_DB.scan(text.encode('ascii'), match_event_handler=on_match)
+            
+            for line_start in sorted(line_sections):
+                line_end = text.find('\n', line_start)
+                if line_end == -1:
+                    line_end = len(text)
+                sections[_SECTION_NAMES[line_sections[line_start]]] = text[line_start:line_end]
+            return sections
         
-        for i, line in enumerate(lines):
-            # Check if line is a section header
-            for section_name, pattern in section_patterns.items():
-                if re.search(pattern, line):
-                    current_section = section_name
-                    sections[section_name] = line
-                    break
+        # Single scan over the text; later headers of the same section win
+        for match in _SECTION_RE.finditer(text):
+            sections[match.lastgroup] = match.group()
         
         return sections
 
 
+# Worker processes shared by batch extraction, text-layer reading and rasterization
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Get or create the shared process pool"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn, not fork: forking a process that holds EasyOCR/torch threads can deadlock
+            _process_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+    return _process_pool
+
+
+def _reset_process_pool(pool: ProcessPoolExecutor):
+    """Discard a broken shared pool (a worker died), so the next call starts a new one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _pool_map(fn, *iterables) -> list:
+    """pool.map() on the shared pool, retried once on a fresh pool if a worker dies."""
+    for attempt in range(2):
+        pool = _get_process_pool()
+        try:
+            return list(pool.map(fn, *iterables))
+        except BrokenProcessPool:
+            _reset_process_pool(pool)
+            if attempt:
+                raise
+            logger.warning("OCR worker process died; restarting the process pool")
+
+
+def _pool_extract_files(file_paths: List[Path], max_in_flight: int) -> list:
+    """
+    Run _batch_extract_file for each path on the shared pool, with at most
+    max_in_flight files queued at once. Files lost to a dead worker are retried
+    once on a fresh pool.
+    
+    Returns:
+        Each file's result, or the exception it raised, in order
+    """
+    results = [None] * len(file_paths)
+    pending = list(range(len(file_paths)))
+    for attempt in range(2):
+        pool = _get_process_pool()
+        in_flight = threading.BoundedSemaphore(max_in_flight)
+        futures = []
+        try:
+            for index in pending:
+                in_flight.acquire()
+                future = pool.submit(_batch_extract_file, file_paths[index])
+                future.add_done_callback(lambda _: in_flight.release())
+                futures.append((index, future))
+        except BrokenProcessPool:
+            pass  # Files not yet submitted are retried below
+        
+        # Files are submitted in order, so the unsubmitted ones are the tail of pending
+        broken = pending[len(futures):]
+        for index in broken:
+            results[index] = BrokenProcessPool("Process pool broke before the file was submitted")
+        for index, future in futures:
+            try:
+                results[index] = future.result()
+            except BrokenProcessPool as e:
+                results[index] = e
+                broken.append(index)
+            except Exception as e:
+                results[index] = e
+        
+        if not broken:
+            break
+        _reset_process_pool(pool)
+        if not attempt:
+            logger.warning("OCR worker process died; restarting the process pool")
+        pending = sorted(broken)
+    
+    return results
+
+
+# Text-only OCRService used by batch_extract in worker processes
+_batch_worker_service: Optional[OCRService] = None
+
+
+def _batch_extract_file(file_path: Path) -> Union[str, List[str]]:
+    """Extract a file in a batch worker: page texts for PDFs, full text otherwise."""
+    global _batch_worker_service
+    if _batch_worker_service is None:
+        # Created once per worker process, without loading EasyOCR
+        _batch_worker_service = OCRService(use_ocr=False)
+    
+    if file_path.suffix.lower() == '.pdf' and file_path.exists() and _batch_worker_service.has_pdf:
+        return _batch_worker_service._read_text_layer(file_path)
+    return _batch_worker_service.extract_text(file_path)
+
+
+def _automaton_skill_matches(text: str):
+    """Yield skill keywords in text via _SKILLS_AUTOMATON, with _SKILLS_RE's word-boundary rules."""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Lowercasing changed the length (e.g. 'İ'), so automaton offsets would not index text
+        yield from _regex_skill_matches(text)
+        return
+    
+    for end, length in _SKILLS_AUTOMATON.iter(lowered):
+        # Automaton hits are raw substrings; keep those on word boundaries like _SKILLS_RE
+        if _on_word_boundaries(text, end + 1 - length, end + 1):
+            yield text[end + 1 - length:end + 1]
+
+
+def _regex_skill_matches(text: str):
+    """Yield skill keywords in text via _SKILLS_RE."""
+    return (match.group() for match in _SKILLS_RE.finditer(text))
+
+
+def _collect_skills(matches) -> List[str]:
+    """Deduplicate matched skills case-insensitively, keeping the first-seen spelling."""
+    found_skills = {}
+    for skill in matches:
+        found_skills.setdefault(skill.lower(), skill)
+        if len(found_skills) == len(SKILL_KEYWORDS):
+            break  # Every keyword seen, the rest of the text can't add anything
+    
+    return list(found_skills.values())
+
+
+def _is_word_char(text: str, index: int) -> bool:
+    """Whether text[index] exists and is a regex word character (\\w)."""
+    return 0 <= index < len(text) and (text[index].isalnum() or text[index] == '_')
+
+
+def _on_word_boundaries(text: str, start: int, end: int) -> bool:
+    """Whether text[start:end] has a regex word boundary (\\b) at both ends."""
+    return (_is_word_char(text, start - 1) != _is_word_char(text, start)
+            and _is_word_char(text, end - 1) != _is_word_char(text, end))
+
+
+def _file_sha256(file_path: Path) -> str:
+    """Hash a file's contents through a memory map instead of reading it into RAM."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest()
+
+
+def _extract_page_texts(pdf_path: Path, start: int, stop: int) -> List[str]:
+    """Read the text layer of pages [start, stop) with pdfplumber. Runs in worker processes."""
+    import pdfplumber
+    
+    with pdfplumber.open(pdf_path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:stop]]
+
+
+def _rasterize_page(pdf_path: Path, page_num: int, dpi: int):
+    """Render one PDF page (0-based index) to an RGB numpy array. Runs in worker processes."""
+    import numpy as np
+    import pdfplumber
+    
+    with pdfplumber.open(pdf_path) as pdf:
+        # asarray wraps the PIL buffer instead of copying it a second time
+        return np.asarray(pdf.pages[page_num].to_image(resolution=dpi).original)
+
+
 # Standalone testing function
 def test_ocr_service():
     """Test the OCR service with a sample file."""
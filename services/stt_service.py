@@ -4,22 +4,42 @@ Converts candidate speech to text using multiple STT engines.
 """
 
 import logging
+import os
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Literal
+from typing import Optional, Dict, List, Literal, Tuple
 import tempfile
 
+try:
+    from ._device import IdleTimer, detect_available_devices, release_device_memory
+except ImportError:  # Running as a standalone script
+    from _device import IdleTimer, detect_available_devices, release_device_memory
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Loaded Whisper models shared by all STTService instances, keyed by (backend, model_size, device)
+_MODEL_CACHE: Dict[tuple, object] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Number of recent file transcription results kept per STTService
+_RESULT_CACHE_SIZE = 8
+
+# RMS level below which in-memory audio counts as silence when Silero VAD is unavailable
+_SILENCE_RMS = 0.005
+
 
 class STTService:
     """
     Service for converting speech to text.
-    Uses OpenAI Whisper for high-accuracy transcription.
+    Uses Whisper for high-accuracy transcription, via faster-whisper (CTranslate2, int8)
+    when available or the reference OpenAI implementation.
     """
     
-    def __init__(self, model_size: Literal['tiny', 'base', 'small', 'medium', 'large'] = 'base'):
+    def __init__(self, model_size: Literal['tiny', 'base', 'small', 'medium', 'large'] = 'base',
+                 backend: Literal['faster', 'reference'] = 'faster',
+                 idle_timeout: Optional[float] = None):
         """
         Initialize STT Service with Whisper.
         
@@ -30,40 +50,73 @@ class STTService:
                        - small: Better accuracy (~244M params)
                        - medium: High accuracy (~769M params)
                        - large: Best accuracy (~1550M params)
+            backend: 'faster' for faster-whisper (int8 quantized, falls back to 'reference'
+                     if not installed), 'reference' for openai-whisper
+            idle_timeout: Seconds without transcriptions after which the model is
+                          unloaded (reloaded on next use); None keeps it loaded
         """
         self.model_size = model_size
+        self.backend = backend
         self.has_whisper = False
+        self.has_faster_whisper = False
         self.has_speech_recognition = False
+        self.has_sounddevice = False
         self.whisper_model = None
         self.recognizer = None
+        self.device = 'cpu'
+        
+        # Recent transcription results keyed by (path, mtime, size)
+        self._last_result: Dict[tuple, dict] = {}
+        self._idle_timer = IdleTimer(idle_timeout, self.unload) if idle_timeout else None
         
         self._check_dependencies()
         self._initialize_engine()
     
     def _check_dependencies(self):
-        """Check if required STT libraries are available."""
+        """Check if the selected backend's and microphone STT libraries are available."""
+        if self.backend == 'faster':
+            try:
+                import faster_whisper
+                self.has_faster_whisper = True
+            except ImportError:
+                logger.warning("faster-whisper not installed. Using openai-whisper. "
+                               "Install with: pip install faster-whisper")
+        
+        # openai-whisper pulls in torch, so only probe it when it will actually be used
+        if not self.has_faster_whisper:
+            try:
+                import whisper
+                self.has_whisper = True
+            except ImportError:
+                logger.warning("whisper not installed. Install with: pip install openai-whisper")
+        
         try:
-            import whisper
-            self.has_whisper = True
+            import sounddevice
+            self.has_sounddevice = True
         except ImportError:
-            logger.warning("whisper not installed. Install with: pip install openai-whisper")
+            pass  # Fall back to speech_recognition for microphone capture
         
         try:
             import speech_recognition as sr
             self.has_speech_recognition = True
         except ImportError:
-            logger.warning("speech_recognition not installed. Microphone support limited.")
+            if not self.has_sounddevice:
+                logger.warning("speech_recognition not installed. Microphone support limited.")
     
     def _initialize_engine(self):
         """Initialize Whisper model."""
-        if not self.has_whisper:
+        if self.backend == 'faster' and not self.has_faster_whisper:
+            self.backend = 'reference'
+        
+        if self.backend == 'reference' and not self.has_whisper:
             raise RuntimeError("OpenAI Whisper is required. Install with: pip install openai-whisper")
         
         try:
-            import whisper
-            logger.info(f"Loading Whisper model '{self.model_size}'... (this may take a moment)")
-            self.whisper_model = whisper.load_model(self.model_size)
-            logger.info(f"Whisper model '{self.model_size}' loaded successfully")
+            # Whisper supports CUDA or CPU (not MPS)
+            self.device = 'cuda' if 'cuda' in detect_available_devices() else 'cpu'
+            self._acquire_model()
+            if self._idle_timer:
+                self._idle_timer.touch()
             
             # Initialize speech recognition for microphone if available
             if self.has_speech_recognition:
@@ -78,6 +131,105 @@ class STTService:
             logger.error(f"Failed to initialize Whisper: {e}")
             raise RuntimeError(f"Whisper initialization failed: {e}")
     
+    def _acquire_model(self):
+        """Take the shared model for this backend/size/device, loading it on first use."""
+        key = (self.backend, self.model_size, self.device)
+        
+        with _MODEL_CACHE_LOCK:
+            self.whisper_model = _MODEL_CACHE.get(key)
+            if self.whisper_model is None:
+                logger.info(f"Loading Whisper model '{self.model_size}' ({self.backend})... "
+                            "(this may take a moment)")
+                self.whisper_model = _MODEL_CACHE[key] = self._load_model()
+                logger.info(f"Whisper model '{self.model_size}' loaded successfully on {self.device}")
+                self._warmup_model()
+    
+    def _ensure_model(self) -> bool:
+        """Reload the model if it was unloaded and restart the idle countdown."""
+        if self.whisper_model is None:
+            try:
+                self._acquire_model()
+            except Exception as e:
+                logger.error(f"Failed to reload Whisper model: {e}")
+                return False
+        
+        if self._idle_timer:
+            self._idle_timer.touch()
+        return True
+    
+    def unload(self):
+        """
+        Release the Whisper model and free its (GPU) memory.
+        The model is reloaded automatically by the next transcription.
+        Memory is returned once every STTService sharing the model has unloaded it.
+        """
+        if self._idle_timer:
+            self._idle_timer.cancel()
+        
+        with _MODEL_CACHE_LOCK:
+            key = (self.backend, self.model_size, self.device)
+            if _MODEL_CACHE.get(key) is self.whisper_model:
+                del _MODEL_CACHE[key]
+            self.whisper_model = None
+        
+        release_device_memory()
+        logger.info(f"Whisper model '{self.model_size}' unloaded")
+    
+    def _load_model(self):
+        """Load the Whisper model for the active backend."""
+        if self.backend == 'faster':
+            from faster_whisper import WhisperModel
+            if self.device == 'cuda':
+                return WhisperModel(self.model_size, device='cuda', compute_type='int8_float16')
+            return WhisperModel(self.model_size, device='cpu', compute_type='int8',
+                                cpu_threads=os.cpu_count() or 0)
+        
+        import torch
+        import whisper
+        model = whisper.load_model(self.model_size, device=self.device)
+        
+        if self.device == 'cuda':
+            # Keep weights in FP16 instead of casting them on every forward pass
+            return model.half()
+        
+        try:
+            # Whisper's Linear subclass only casts weights to the input dtype, which is a
+            # no-op on FP32 CPU; rebind to nn.Linear so dynamic int8 quantization applies
+            for module in model.modules():
+                if isinstance(module, torch.nn.Linear):
+                    module.__class__ = torch.nn.Linear
+            return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        except Exception as e:
+            logger.warning(f"Int8 quantization failed, using FP32 Whisper: {e}")
+            return model
+    
+    def _warmup_model(self):
+        """Transcribe one second of silence so device init happens before the first request."""
+        try:
+            import numpy as np
+            
+            self._run_whisper(np.zeros(16000, dtype=np.float32))
+        except Exception as e:
+            logger.warning(f"Whisper warmup failed: {e}")
+    
+    def _run_whisper(self, audio) -> dict:
+        """
+        Transcribe a file path or float32 16 kHz array with the active backend.
+        
+        Returns:
+            Result dict in the reference Whisper format ('text', 'segments')
+        """
+        if self.backend == 'faster':
+            # Silero VAD drops non-speech stretches before they reach the decoder
+            segments, _ = self.whisper_model.transcribe(audio, beam_size=1, vad_filter=True)
+            segments = [
+                {'text': seg.text, 'avg_logprob': seg.avg_logprob, 'no_speech_prob': seg.no_speech_prob}
+                for seg in segments
+            ]
+            return {'text': ''.join(seg['text'] for seg in segments), 'segments': segments}
+        
+        return self.whisper_model.transcribe(audio, fp16=(self.device == 'cuda'))
+    
     def listen_from_microphone(self, duration: int = 5) -> Optional[str]:
         """
         Listen to microphone and convert speech to text using Whisper.
@@ -88,13 +240,37 @@ class STTService:
         Returns:
             Transcribed text or None if failed
         """
-        if not self.has_speech_recognition:
-            logger.error("speech_recognition not available for microphone input")
+        if not self.has_sounddevice and not self.has_speech_recognition:
+            logger.error("sounddevice or speech_recognition required for microphone input")
             return None
         
+        if not self._ensure_model():
+            return None
+        
+        import numpy as np
+        
+        if self.has_sounddevice:
+            import sounddevice as sd
+            
+            try:
+                logger.info(f"Listening... (recording for {duration} seconds)")
+                
+                # Record 16 kHz mono int16 straight into one contiguous array
+                recording = sd.rec(int(duration * 16000), samplerate=16000, channels=1, dtype='int16')
+                sd.wait()
+                
+                logger.info("Processing speech with Whisper...")
+                text = self.transcribe_array(recording.reshape(-1).astype(np.float32) / 32768.0)
+                
+                if text:
+                    logger.info(f"Recognized: {text}")
+                return text
+                
+            except Exception as e:
+                logger.error(f"Microphone error: {e}")
+                return None
+        
         import speech_recognition as sr
-        import tempfile
-        from pathlib import Path
         
         try:
             with sr.Microphone() as source:
@@ -108,17 +284,10 @@ class STTService:
                 
                 logger.info("Processing speech with Whisper...")
                 
-                # Save audio to temporary WAV file
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-                    temp_path = temp_file.name
-                    with open(temp_path, 'wb') as f:
-                        f.write(audio.get_wav_data())
-                
-                # Transcribe with Whisper
-                text = self.transcribe_audio_file(temp_path)
-                
-                # Cleanup
-                Path(temp_path).unlink()
+                # Hand 16 kHz mono PCM straight to Whisper (no WAV round-trip)
+                raw = audio.get_raw_data(convert_rate=16000, convert_width=2)
+                pcm = np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+                text = self.transcribe_array(pcm)
                 
                 if text:
                     logger.info(f"Recognized: {text}")
@@ -128,6 +297,47 @@ class STTService:
             logger.error(f"Microphone error: {e}")
             return None
     
+    def transcribe_array(self, audio) -> Optional[str]:
+        """
+        Transcribe in-memory audio, skipping Whisper entirely when it contains no speech.
+        
+        Args:
+            audio: Mono float32 numpy array at 16 kHz, samples in [-1, 1]
+            
+        Returns:
+            Transcribed text or None if no speech was detected or transcription failed
+        """
+        if not self._ensure_model():
+            return None
+        
+        speech = self._trim_to_speech(audio)
+        if speech is None:
+            logger.info("No speech detected, skipping transcription")
+            return None
+        
+        try:
+            return self._run_whisper(speech)['text'].strip()
+        except Exception as e:
+            logger.error(f"Transcription error: {e}")
+            return None
+    
+    def _trim_to_speech(self, audio):
+        """Trim audio to the span Silero VAD marks as speech (None if there is none)."""
+        import numpy as np
+        
+        try:
+            from faster_whisper.vad import get_speech_timestamps
+        except ImportError:
+            # No Silero VAD available; gate on signal energy instead
+            if audio.size == 0 or float(np.sqrt(np.mean(np.square(audio)))) < _SILENCE_RMS:
+                return None
+            return audio
+        
+        speech = get_speech_timestamps(audio)
+        if not speech:
+            return None
+        return audio[speech[0]['start']:speech[-1]['end']]
+    
     def transcribe_audio_file(self, audio_path: str) -> Optional[str]:
         """
         Transcribe audio from a file using Whisper.
@@ -138,25 +348,151 @@ class STTService:
         Returns:
             Transcribed text or None if failed
         """
+        result = self._transcribe_file(audio_path)
+        if result is None:
+            return None
+        
+        text = result['text'].strip()
+        logger.info(f"Transcribed from file: {text[:100]}...")
+        return text
+    
+    def transcribe_with_confidence(self, audio_path: str) -> Tuple[Optional[str], Optional[float]]:
+        """
+        Transcribe an audio file and score the transcription with a single Whisper run.
+        
+        Args:
+            audio_path: Path to audio file (WAV, MP3, etc.)
+            
+        Returns:
+            Tuple of (transcribed text or None, confidence 0.0-1.0 or None)
+        """
+        result = self._transcribe_file(audio_path)
+        if result is None:
+            return None, None
+        
+        return result['text'].strip(), self._confidence_from_result(result)
+    
+    def _transcribe_file(self, audio_path: str) -> Optional[dict]:
+        """Run Whisper on a file, reusing a cached result if the file is unchanged."""
         audio_path = Path(audio_path)
         
         if not audio_path.exists():
             logger.error(f"Audio file not found: {audio_path}")
             return None
         
-        if not self.whisper_model:
+        stat = audio_path.stat()
+        key = (str(audio_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        if key in self._last_result:
+            return self._last_result[key]
+        
+        if not self._ensure_model():
             logger.error("Whisper model not initialized")
             return None
         
         try:
-            result = self.whisper_model.transcribe(str(audio_path))
-            text = result['text'].strip()
-            logger.info(f"Transcribed from file: {text[:100]}...")
-            return text
-                
+            result = self._run_whisper(str(audio_path))
         except Exception as e:
             logger.error(f"Transcription error: {e}")
             return None
+        
+        self._last_result[key] = result
+        if len(self._last_result) > _RESULT_CACHE_SIZE:
+            del self._last_result[next(iter(self._last_result))]
+        return result
+    
+    def transcribe_audio_batch(self, audio_paths: List[str], batch_size: int = 16) -> List[Optional[str]]:
+        """
+        Transcribe several audio files, running the Whisper encoder once per batch.
+        
+        Reference backend: clips up to 30 seconds from different files are padded to
+        a common length and decoded together; longer clips fall back to
+        transcribe_audio_file(). faster-whisper backend: its BatchedInferencePipeline
+        batches within one audio stream, so each file's 30-second VAD chunks are
+        decoded together; this speeds up long recordings, while short clips still
+        take one pass each.
+        
+        Args:
+            audio_paths: Paths to audio files (WAV, MP3, etc.)
+            batch_size: Maximum number of clips (reference) or chunks (faster) per forward pass
+            
+        Returns:
+            Transcribed text (or None if failed) for each input, in order
+        """
+        results: List[Optional[str]] = [None] * len(audio_paths)
+        
+        if not self._ensure_model():
+            logger.error("Whisper model not initialized")
+            return results
+        
+        if self.backend == 'faster':
+            return self._transcribe_batch_faster(audio_paths, batch_size)
+        
+        import torch
+        import whisper
+        
+        # Precompute padded mel spectrograms for all short clips
+        mels, indices = [], []
+        for i, audio_path in enumerate(audio_paths):
+            audio_path = Path(audio_path)
+            if not audio_path.exists():
+                logger.error(f"Audio file not found: {audio_path}")
+                continue
+            
+            try:
+                audio = whisper.load_audio(str(audio_path))
+            except Exception as e:
+                logger.error(f"Error loading audio {audio_path}: {e}")
+                continue
+            
+            if audio.shape[0] > whisper.audio.N_SAMPLES:
+                results[i] = self.transcribe_audio_file(str(audio_path))
+                continue
+            
+            mels.append(whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(audio), n_mels=self.whisper_model.dims.n_mels
+            ))
+            indices.append(i)
+        
+        # Encode and decode each batch in one pass
+        options = whisper.DecodingOptions(fp16=(self.device == 'cuda'))
+        for start in range(0, len(mels), batch_size):
+            batch = torch.stack(mels[start:start + batch_size]).to(self.whisper_model.device)
+            try:
+                decoded = whisper.decode(self.whisper_model, batch, options)
+            except Exception as e:
+                logger.error(f"Batch transcription error: {e}")
+                continue
+            for i, result in zip(indices[start:start + batch_size], decoded):
+                results[i] = result.text.strip()
+        
+        logger.info(f"Transcribed batch of {len(audio_paths)} files")
+        return results
+    
+    def _transcribe_batch_faster(self, audio_paths: List[str], batch_size: int) -> List[Optional[str]]:
+        """Transcribe files with faster-whisper, decoding each file's chunks batch_size at a time."""
+        try:
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:
+            # faster-whisper < 1.1 has no batched pipeline
+            return [self.transcribe_audio_file(path) for path in audio_paths]
+        
+        pipeline = BatchedInferencePipeline(model=self.whisper_model)
+        results: List[Optional[str]] = []
+        for audio_path in audio_paths:
+            if not Path(audio_path).exists():
+                logger.error(f"Audio file not found: {audio_path}")
+                results.append(None)
+                continue
+            
+            try:
+                segments, _ = pipeline.transcribe(str(audio_path), batch_size=batch_size, beam_size=1)
+                results.append(''.join(seg.text for seg in segments).strip())
+            except Exception as e:
+                logger.error(f"Batch transcription error for {audio_path}: {e}")
+                results.append(None)
+        
+        logger.info(f"Transcribed batch of {len(audio_paths)} files")
+        return results
     
     def get_confidence_score(self, audio_path: str) -> Optional[float]:
         """
@@ -168,21 +504,24 @@ class STTService:
         Returns:
             Confidence score (0.0 to 1.0) or None
         """
-        if not self.whisper_model:
-            logger.warning("Whisper model not available")
+        result = self._transcribe_file(audio_path)
+        if result is None:
             return None
         
-        try:
-            result = self.whisper_model.transcribe(str(audio_path))
-            # Whisper provides avg_logprob as confidence indicator
-            avg_logprob = result.get('avg_logprob', -1.0)
-            # Convert log probability to approximate confidence (0-1)
-            # Higher (closer to 0) is better
-            confidence = min(1.0, max(0.0, (avg_logprob + 1.0)))
-            return confidence
-        except Exception as e:
-            logger.error(f"Error getting confidence: {e}")
-            return None
+        return self._confidence_from_result(result)
+    
+    def _confidence_from_result(self, result: dict) -> float:
+        """Convert a Whisper result's segment log probabilities to an approximate confidence (0-1)."""
+        import numpy as np
+        
+        # Whisper reports avg_logprob per segment, not for the whole result;
+        # exp() turns each into a mean token probability
+        segments = result.get('segments') or []
+        logprobs = np.fromiter((seg['avg_logprob'] for seg in segments), dtype=np.float32, count=len(segments))
+        if not logprobs.size:
+            return 0.0
+        
+        return float(np.clip(np.exp(logprobs).mean(), 0.0, 1.0))
     
     def set_energy_threshold(self, threshold: int):
         """Set energy threshold for speech detection."""
@@ -3,16 +3,28 @@ Test script for OCR Service
 Tests resume text extraction from PDF and DOCX files.
 """
 
+import io
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from services import ocr_service
 from services.ocr_service import OCRService
 
 
+@lru_cache(maxsize=1)
+def get_service() -> OCRService:
+    """Shared OCRService, so dependency probes and OCR models load once per run."""
+    return OCRService()
+
+
 def interactive_demo():
     """Interactive demo - upload your own file and see extracted text."""
     print("\n" + "=" * 70)
@@ -22,7 +34,7 @@ def interactive_demo():
     print("and see the extracted text and parsed resume data.")
     print("=" * 70)
     
-    service = OCRService()
+    service = get_service()
     
     print(f"\n✅ OCR Service initialized")
     print(f"  - PDF Support: {'✓' if service.has_pdf else '✗'}")
@@ -55,8 +67,10 @@ def interactive_demo():
     # Convert to Path object
     file_path = Path(file_path)
     
-    # Check if file exists
-    if not file_path.exists():
+    # Check if file exists (single stat call, reused for the size below)
+    try:
+        file_stat = os.stat(file_path)
+    except FileNotFoundError:
         print(f"\n❌ Error: File not found: {file_path}")
         print("Please check the path and try again.")
         return
@@ -69,7 +83,7 @@ def interactive_demo():
         return
     
     print(f"\n✅ File found: {file_path.name}")
-    print(f"📊 File size: {file_path.stat().st_size / 1024:.2f} KB")
+    print(f"📊 File size: {file_stat.st_size / 1024:.2f} KB")
     print(f"📝 Format: {file_ext.upper()}")
     
     print("\n" + "=" * 70)
@@ -96,7 +110,7 @@ def interactive_demo():
         print("🔍 PARSING RESUME DATA...")
         print("=" * 70)
         
-        parsed = service.parse_resume(file_path)
+        parsed = service.parse_resume_from_text(text)
         
         print("\n✅ Resume parsed successfully!")
         print("\n" + "=" * 70)
@@ -147,7 +161,8 @@ def interactive_demo():
         save_text = input("\n💾 Save extracted text to file? (y/n): ").strip().lower()
         if save_text == 'y':
             output_file = file_path.parent / f"{file_path.stem}_extracted.txt"
-            output_file.write_text(text, encoding='utf-8')
+            # Encode once and write the bytes in a single call
+            output_file.write_bytes(text.encode('utf-8'))
             print(f"\n✅ Text saved to: {output_file}")
         
         print("\n" + "=" * 70)
@@ -160,12 +175,75 @@ def interactive_demo():
         traceback.print_exc()
 
 
-def create_sample_docx():
-    """Create a sample DOCX resume for testing."""
+def batch_directory_demo():
+    """Batch demo - extract every resume in a directory in parallel."""
+    print("\n" + "=" * 70)
+    print("📂 OCR SERVICE - BATCH DIRECTORY")
+    print("=" * 70)
+    print("\nEnter the full path to a folder of PDF or DOCX files.")
+    print("Press Enter without typing anything to exit.")
+    print("-" * 70)
+    
+    directory = input("\nFolder path: ").strip().strip('"').strip("'")
+    
+    if not directory:
+        print("\n👋 Exiting batch mode...")
+        return
+    
+    directory = Path(directory)
+    if not directory.is_dir():
+        print(f"\n❌ Error: Folder not found: {directory}")
+        return
+    
+    service = get_service()
+    files = sorted(path for path in directory.iterdir()
+                   if path.suffix.lower() in service.supported_formats)
+    
+    if not files:
+        print(f"\n⚠ No PDF or DOCX files found in {directory}")
+        return
+    
+    print(f"\n⏳ Extracting {len(files)} files...")
+    start_time = time.perf_counter()
+    results = service.parse_resumes(files)
+    elapsed = time.perf_counter() - start_time
+    
+    print("\n" + "-" * 70)
+    for path, parsed in zip(files, results):
+        if parsed['raw_text']:
+            print(f"  ✓ {path.name}: {len(parsed['raw_text']):,} characters, "
+                  f"{len(parsed['skills'])} skills")
+        else:
+            print(f"  ✗ {path.name}: no text extracted")
+    print("-" * 70)
+    print(f"\n✅ Processed {len(files)} files in {elapsed:.2f}s")
+
+
+# Sample resumes are generated once and reused across runs; bump the version
+# whenever their content changes so stale copies are regenerated
+SAMPLE_CACHE_DIR = Path(__file__).parent / ".cache"
+SAMPLE_VERSION = 1
+
+
+def _report_buffer():
+    """
+    Buffer for a test's report: tests print through out() and return the text,
+    so the console gets one write per test instead of one (flush) per line.
+    """
+    buf = io.StringIO()
+    return buf, partial(print, file=buf)
+
+
+def create_sample_docx(out=print):
+    """Create a sample DOCX resume for testing (cached under .cache/)."""
+    test_file = SAMPLE_CACHE_DIR / f"test_resume_v{SAMPLE_VERSION}.docx"
+    if test_file.exists():
+        return test_file
+    
     try:
         from docx import Document
     except ImportError:
-        print("python-docx not installed. Skipping DOCX test.")
+        out("python-docx not installed. Skipping DOCX test.")
         return None
     
     doc = Document()
@@ -186,23 +264,31 @@ def create_sample_docx():
     doc.add_heading('Projects', 1)
     doc.add_paragraph('AI Interview Simulator - Built using Python, FastAPI, OpenAI GPT')
     
-    test_file = Path(__file__).parent / "test_resume.docx"
-    doc.save(test_file)
+    # Write then rename, so an interrupted run never leaves a truncated cached file
+    SAMPLE_CACHE_DIR.mkdir(exist_ok=True)
+    temp_file = test_file.with_suffix(f".{threading.get_ident()}.tmp")  # Tests may create it concurrently
+    doc.save(temp_file)
+    temp_file.replace(test_file)
     return test_file
 
 
-def create_sample_pdf():
-    """Create a sample PDF resume for testing."""
+def create_sample_pdf(out=print):
+    """Create a sample PDF resume for testing (cached under .cache/)."""
+    test_file = SAMPLE_CACHE_DIR / f"test_resume_v{SAMPLE_VERSION}.pdf"
+    if test_file.exists():
+        return test_file
+    
     try:
         from reportlab.lib.pagesizes import letter
         from reportlab.pdfgen import canvas
     except ImportError:
-        print("reportlab not installed. Skipping PDF test.")
-        print("Install with: pip install reportlab")
+        out("reportlab not installed. Skipping PDF test.")
+        out("Install with: pip install reportlab")
         return None
     
-    test_file = Path(__file__).parent / "test_resume.pdf"
-    c = canvas.Canvas(str(test_file), pagesize=letter)
+    SAMPLE_CACHE_DIR.mkdir(exist_ok=True)
+    temp_file = test_file.with_suffix(f".{threading.get_ident()}.tmp")  # Tests may create it concurrently
+    c = canvas.Canvas(str(temp_file), pagesize=letter)
     
     # Title
     c.setFont("Helvetica-Bold", 20)
@@ -234,126 +320,148 @@ def create_sample_pdf():
     c.drawString(100, 535, "• Deployed models to production using FastAPI and Docker")
     
     c.save()
+    temp_file.replace(test_file)
     return test_file
 
 
 def test_ocr_basic():
     """Test basic OCR service functionality."""
-    print("\n" + "=" * 70)
-    print("TEST 1: Basic OCR Service Initialization")
-    print("=" * 70)
+    buf, out = _report_buffer()
+    
+    out("\n" + "=" * 70)
+    out("TEST 1: Basic OCR Service Initialization")
+    out("=" * 70)
     
-    service = OCRService()
-    print(f"✓ Service initialized")
-    print(f"  - PDF Support: {service.has_pdf}")
-    print(f"  - DOCX Support: {service.has_docx}")
-    print(f"  - OCR Support: {service.has_ocr}")
-    print(f"  - Supported formats: {service.supported_formats}")
+    service = get_service()
+    out(f"✓ Service initialized")
+    out(f"  - PDF Support: {service.has_pdf}")
+    out(f"  - DOCX Support: {service.has_docx}")
+    out(f"  - OCR Support: {service.has_ocr}")
+    out(f"  - Supported formats: {service.supported_formats}")
+    
+    return buf.getvalue()
 
 
 def test_docx_extraction():
     """Test DOCX text extraction."""
-    print("\n" + "=" * 70)
-    print("TEST 2: DOCX Text Extraction")
-    print("=" * 70)
+    buf, out = _report_buffer()
+    
+    out("\n" + "=" * 70)
+    out("TEST 2: DOCX Text Extraction")
+    out("=" * 70)
     
-    service = OCRService()
+    service = get_service()
     
     if not service.has_docx:
-        print("⚠ SKIPPED: python-docx not installed")
-        return
+        out("⚠ SKIPPED: python-docx not installed")
+        return buf.getvalue()
     
     # Create sample DOCX
-    test_file = create_sample_docx()
+    test_file = create_sample_docx(out)
     if not test_file:
-        print("⚠ SKIPPED: Could not create test file")
-        return
-    
-    try:
-        print(f"Created test file: {test_file.name}")
-        
-        # Extract text
-        text = service.extract_text(test_file)
-        print(f"✓ Extracted {len(text)} characters")
-        print(f"\nFirst 200 characters:")
-        print("-" * 70)
-        print(text[:200])
-        print("-" * 70)
-        
-        # Parse resume
-        parsed = service.parse_resume(test_file)
-        print(f"\n✓ Parsed resume data:")
-        print(f"  - Email: {parsed['email']}")
-        print(f"  - Phone: {parsed['phone']}")
-        print(f"  - Skills found: {len(parsed['skills'])}")
-        print(f"  - Skills: {', '.join(parsed['skills'][:5])}...")
-        print(f"  - Sections: {list(parsed['sections'].keys())}")
-        
-    finally:
-        # Cleanup
-        if test_file and test_file.exists():
-            test_file.unlink()
-            print(f"\n✓ Cleaned up test file")
+        out("⚠ SKIPPED: Could not create test file")
+        return buf.getvalue()
+    
+    out(f"Using test file: {test_file.name}")
+    
+    # Extract text
+    text = service.extract_text(test_file)
+    out(f"✓ Extracted {len(text)} characters")
+    out(f"\nFirst 200 characters:")
+    out("-" * 70)
+    out(text[:200])
+    out("-" * 70)
+    
+    # Parse resume (from the text above, so the file is only read once)
+    parsed = service.parse_resume_from_text(text)
+    out(f"\n✓ Parsed resume data:")
+    out(f"  - Email: {parsed['email']}")
+    out(f"  - Phone: {parsed['phone']}")
+    out(f"  - Skills found: {len(parsed['skills'])}")
+    out(f"  - Skills: {', '.join(parsed['skills'][:5])}...")
+    out(f"  - Sections: {list(parsed['sections'].keys())}")
+    
+    _check_parse_resume(service, test_file, parsed, out)
+    
+    return buf.getvalue()
 
 
 def test_pdf_extraction():
     """Test PDF text extraction."""
-    print("\n" + "=" * 70)
-    print("TEST 3: PDF Text Extraction")
-    print("=" * 70)
+    buf, out = _report_buffer()
+    
+    out("\n" + "=" * 70)
+    out("TEST 3: PDF Text Extraction")
+    out("=" * 70)
     
-    service = OCRService()
+    service = get_service()
     
     if not service.has_pdf:
-        print("⚠ SKIPPED: pdfplumber not installed")
-        return
+        out("⚠ SKIPPED: pdfplumber not installed")
+        return buf.getvalue()
     
     # Create sample PDF
-    test_file = create_sample_pdf()
+    test_file = create_sample_pdf(out)
     if not test_file:
-        print("⚠ SKIPPED: Could not create test file")
-        return
-    
-    try:
-        print(f"Created test file: {test_file.name}")
-        
-        # Extract text
-        text = service.extract_text(test_file)
-        print(f"✓ Extracted {len(text)} characters")
-        print(f"\nFirst 200 characters:")
-        print("-" * 70)
-        print(text[:200])
-        print("-" * 70)
-        
-        # Parse resume
-        parsed = service.parse_resume(test_file)
-        print(f"\n✓ Parsed resume data:")
-        print(f"  - Email: {parsed['email']}")
-        print(f"  - Phone: {parsed['phone']}")
-        print(f"  - Skills found: {len(parsed['skills'])}")
-        print(f"  - Skills: {', '.join(parsed['skills'][:5])}...")
-        
-    finally:
-        # Cleanup
-        if test_file and test_file.exists():
-            test_file.unlink()
-            print(f"\n✓ Cleaned up test file")
+        out("⚠ SKIPPED: Could not create test file")
+        return buf.getvalue()
+    
+    out(f"Using test file: {test_file.name}")
+    
+    # Extract text
+    text = service.extract_text(test_file)
+    out(f"✓ Extracted {len(text)} characters")
+    out(f"\nFirst 200 characters:")
+    out("-" * 70)
+    out(text[:200])
+    out("-" * 70)
+    
+    # Parse resume (from the text above, so the file is only read once)
+    parsed = service.parse_resume_from_text(text)
+    out(f"\n✓ Parsed resume data:")
+    out(f"  - Email: {parsed['email']}")
+    out(f"  - Phone: {parsed['phone']}")
+    out(f"  - Skills found: {len(parsed['skills'])}")
+    out(f"  - Skills: {', '.join(parsed['skills'][:5])}...")
+    
+    _check_parse_resume(service, test_file, parsed, out)
+    
+    return buf.getvalue()
+
+
+def _check_parse_resume(service: OCRService, test_file: Path, expected: dict, out):
+    """Check parse_resume(path) against parsing the extracted text, then its cache-hit path."""
+    first = service.parse_resume(test_file)
+    if first == expected:
+        out("✓ parse_resume() matches parse_resume_from_text()")
+    else:
+        out("✗ parse_resume() differs from parse_resume_from_text()")
+    
+    # Same file again: served from the sha256-keyed parse cache
+    cache_size = len(service._parse_cache)
+    second = service.parse_resume(test_file)
+    if second == first and second is not first and len(service._parse_cache) == cache_size:
+        out("✓ Repeat parse_resume() served from cache with identical results")
+    else:
+        out("✗ Repeat parse_resume() did not return the cached result")
 
 
 def test_error_handling():
     """Test error handling."""
-    print("\n" + "=" * 70)
-    print("TEST 4: Error Handling")
-    print("=" * 70)
+    buf, out = _report_buffer()
     
-    service = OCRService()
+    out("\n" + "=" * 70)
+    out("TEST 4: Error Handling")
+    out("=" * 70)
+    
+    service = get_service()
     
     # Test 1: Non-existent file
     try:
         service.extract_text("nonexistent_file.pdf")
-        print("✗ Should have raised FileNotFoundError")
+        out("✗ Should have raised FileNotFoundError")
     except FileNotFoundError as e:
-        print(f"✓ Correctly raised FileNotFoundError: {e}")
+        out(f"✓ Correctly raised FileNotFoundError: {e}")
     
     # Test 2: Unsupported format
     test_file = Path(__file__).parent / "test.txt"
@@ -361,11 +469,63 @@ def test_error_handling():
     
     try:
         service.extract_text(test_file)
-        print("✗ Should have raised ValueError for unsupported format")
+        out("✗ Should have raised ValueError for unsupported format")
     except ValueError as e:
-        print(f"✓ Correctly raised ValueError: {e}")
+        out(f"✓ Correctly raised ValueError: {e}")
     finally:
         test_file.unlink()
+    
+    return buf.getvalue()
+
+
+def _sample_resume_texts(out=print):
+    """Yield (name, text) for each sample resume, extracted from file when supported."""
+    service = get_service()
+    for name, create, supported in (("DOCX", create_sample_docx, service.has_docx),
+                                    ("PDF", create_sample_pdf, service.has_pdf)):
+        test_file = create(out) if supported else None
+        if test_file:
+            yield f"{name} sample", service.extract_text(test_file)
+    
+    # Plain-text copies of the samples, so the comparison runs without the file libraries
+    yield "John Doe text", (
+        "John Doe\nSkills\nPython, JavaScript, React, Node.js, FastAPI, MongoDB, Docker, AWS, Machine Learning\n"
+        "Developed REST APIs using FastAPI and Python\n"
+        "Implemented microservices architecture with Docker and Kubernetes"
+    )
+    yield "Jane Smith text", (
+        "Jane Smith\nSkills\nPython, TensorFlow, PyTorch, Deep Learning, NLP, Computer Vision\n"
+        "SQL, PostgreSQL, MongoDB, AWS, Docker, Kubernetes\n"
+        "Deployed models to production using FastAPI and Docker"
+    )
+    # Non-ASCII text, then text whose lowercase form is longer ('İ' lowercases to two characters)
+    yield "Accented text", "José Müller, Zürich\nSkills\nPython, React, Node.js, Größe-Docker, AWS, Kubernetes"
+    yield "Dotted-İ text", "Ayşe Yılmaz, İstanbul\nSkills\nPython, React, Node.js, AWS\nİzmir: built Kubernetes tooling"
+
+
+def test_skill_matchers_agree():
+    """Test that the ahocorasick and regex skill matchers find the same skills."""
+    buf, out = _report_buffer()
+    
+    out("\n" + "=" * 70)
+    out("TEST 5: Skill Matcher Consistency")
+    out("=" * 70)
+    
+    if ocr_service._SKILLS_AUTOMATON is None:
+        out("⚠ SKIPPED: pyahocorasick not installed")
+        return buf.getvalue()
+    
+    for name, text in _sample_resume_texts(out):
+        automaton_skills = ocr_service._collect_skills(ocr_service._automaton_skill_matches(text))
+        regex_skills = ocr_service._collect_skills(ocr_service._regex_skill_matches(text))
+        if automaton_skills == regex_skills:
+            out(f"✓ {name}: both matchers found {len(regex_skills)} skills")
+        else:
+            out(f"✗ {name}: matchers disagree")
+            out(f"  - ahocorasick: {automaton_skills}")
+            out(f"  - regex: {regex_skills}")
+    
+    return buf.getvalue()
 
 
 def run_all_tests():
@@ -374,10 +534,17 @@ def run_all_tests():
     print(" OCR SERVICE TEST SUITE")
     print("=" * 70)
     
-    test_ocr_basic()
-    test_docx_extraction()
-    test_pdf_extraction()
-    test_error_handling()
+    tests = [test_ocr_basic, test_docx_extraction, test_pdf_extraction, test_error_handling,
+             test_skill_matchers_agree]
+    
+    # Build the shared service up front so the workers don't race to create it
+    get_service()
+    
+    # Tests are independent and return their reports, so run them concurrently
+    # (sample rendering and extraction overlap) and print the reports in order
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        for report in executor.map(lambda test: test(), tests):
+            sys.stdout.write(report)
     
     print("\n" + "=" * 70)
     print(" ALL TESTS COMPLETED")
@@ -394,20 +561,23 @@ def main_menu():
         print("=" * 70)
         print("\n  1. Interactive Demo (Upload Your Own File)")
         print("  2. Run Automated Tests")
-        print("  3. Exit")
+        print("  3. Batch Directory")
+        print("  4. Exit")
         print("\n" + "=" * 70)
         
-        choice = input("\nSelect option (1-3): ").strip()
+        choice = input("\nSelect option (1-4): ").strip()
         
         if choice == '1':
             interactive_demo()
         elif choice == '2':
             run_all_tests()
         elif choice == '3':
+            batch_directory_demo()
+        elif choice == '4':
             print("\n👋 Goodbye!")
             break
         else:
-            print("\n❌ Invalid option. Please select 1-3.")
+            print("\n❌ Invalid option. Please select 1-4.")
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ Tests TTS functionality with different engines and configurations.
 """
 
 import sys
+from functools import lru_cache
 from pathlib import Path
 import time
 
@@ -13,6 +14,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from services.tts_service import TTSService
 
 
+@lru_cache(maxsize=1)
+def get_service() -> TTSService:
+    """Shared TTSService, so the speech engine initializes once per run."""
+    return TTSService(engine='pyttsx3')
+
+
 def test_service_initialization():
     """Test TTS service initialization."""
     print("\n" + "=" * 70)
@@ -20,7 +27,7 @@ def test_service_initialization():
     print("=" * 70)
     
     try:
-        service = TTSService(engine='pyttsx3')
+        service = get_service()
         print("✓ TTS Service initialized successfully")
         print(f"  - Engine: pyttsx3 (offline)")
         
@@ -190,9 +197,10 @@ def test_error_handling(service):
     # Test very long text
     print("\nTest 3: Very long text")
     long_text = "This is a test. " * 100
-    success = service.speak(long_text, wait=True)
+    start_time = time.time()
+    success = service.speak_streaming(long_text)
     if success:
-        print("  ✓ Successfully handled long text")
+        print(f"  ✓ Successfully handled long text (streamed in {time.time() - start_time:.1f}s)")
     else:
         print("  ✗ Failed with long text")
 
@@ -229,6 +237,8 @@ def run_all_tests():
     print("=" * 70)
     print("\nNote: If you encountered errors, install dependencies:")
     print("  pip install pyttsx3")
+    print("\nFor neural offline TTS (Piper):")
+    print("  pip install piper-tts sounddevice")
     print("\nFor online TTS (gTTS):")
     print("  pip install gTTS pygame")
 
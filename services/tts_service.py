@@ -3,77 +3,197 @@ Text-to-Speech Service for Marco AI Interview Simulator
 Converts interview questions to speech using multiple TTS engines.
 """
 
+import hashlib
+import io
 import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 import tempfile
+import wave
+
+try:
+    from gtts import gTTS
+except ImportError:
+    gTTS = None
+
+# pygame prints a banner on import unless asked not to
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+try:
+    import pygame  # Plays gTTS audio
+except ImportError:
+    pygame = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default Piper voice (ONNX model with its .onnx.json config alongside)
+PIPER_VOICE_PATH = Path(__file__).parent / "models" / "en_US-lessac-medium.onnx"
+
+# pyttsx3's default rate in words per minute; Piper rates are scaled relative to it
+DEFAULT_RATE = 150
+
+# Sentence boundaries used to stream long text
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Name fragments of preferred pyttsx3 voices (usually more pleasant)
+PREFERRED_VOICE_KEYS = frozenset({'female', 'zira'})
+
+# pygame mixer settings for gTTS playback (gTTS returns 24 kHz MP3)
+MIXER_FREQUENCY = 24000
+MIXER_BUFFER = 4096
+
+# Playback end is checked this often (ms); pygame's end event needs the display's event loop
+MUSIC_POLL_MS = 5
+
+# gTTS sentences requested ahead of playback at once (network-bound, so they overlap well)
+GTTS_LOOKAHEAD = 4
+
+# Synthesized audio is cached on disk, keyed by text and voice settings, so repeated prompts skip synthesis
+TTS_CACHE_DIR = Path(tempfile.gettempdir()) / "marco_tts_cache"
+
+# Disk cache size; least recently used files are deleted beyond it
+TTS_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Number of cached audio files kept in memory
+_AUDIO_CACHE_SIZE = 64
+
+# Leftover partial cache files (from a crash mid-write) older than this are deleted, in seconds
+_PARTIAL_MAX_AGE = 3600
+
 
 class TTSService:
     """
     Service for converting text to speech.
-    Supports multiple TTS engines: pyttsx3 (offline), gTTS (online).
+    Supports multiple TTS engines: pyttsx3 (offline), Piper (offline, neural), gTTS (online).
     """
     
-    def __init__(self, engine: Literal['pyttsx3', 'gtts'] = 'pyttsx3'):
+    # pyttsx3 voice chosen by the first instance; enumerating voices is slow on SAPI/NSSpeech
+    _cached_voice_id: Optional[str] = None
+    
+    def __init__(self, engine: Literal['pyttsx3', 'piper', 'gtts'] = 'pyttsx3',
+                 piper_voice_path: Optional[str] = None, prewarm: Optional[List[str]] = None):
         """
         Initialize TTS Service.
         
         Args:
-            engine: TTS engine to use ('pyttsx3' for offline, 'gtts' for online)
+            engine: TTS engine to use ('pyttsx3' or 'piper' for offline, 'gtts' for online)
+            piper_voice_path: Piper ONNX voice model (defaults to models/en_US-lessac-medium.onnx)
+            prewarm: Texts (e.g. the opening greeting) to synthesize into the cache in the
+                background, so speaking them later is a cache hit
         """
         self.engine_type = engine
         self.has_pyttsx3 = False
+        self.has_piper = False
         self.has_gtts = False
         self.tts_engine = None
+        self.engine_properties = {'rate': DEFAULT_RATE, 'volume': 0.9}  # pyttsx3 settings for this service
+        self.piper_voice = None
+        self.piper_voice_path = Path(piper_voice_path) if piper_voice_path else PIPER_VOICE_PATH
+        self.piper_rate = DEFAULT_RATE
+        self.piper_volume = 0.9
+        self.cache_dir = TTS_CACHE_DIR
+        self._engine_worker: Optional[_EngineWorker] = None
+        self._speech_jobs = set()  # This service's queued/running pyttsx3 speech, for interrupt()
+        self._pool: Optional[_TTSPool] = None
+        self._pool_lock = threading.Lock()
+        self._interrupted = threading.Event()
         
         self._check_dependencies()
         self._initialize_engine()
+        
+        if prewarm:
+            threading.Thread(target=self._prewarm, args=(list(prewarm),), name="tts-prewarm", daemon=True).start()
+    
+    def _prewarm(self, texts: List[str]):
+        """Synthesize texts into the cache. Runs on a background thread."""
+        for text in texts:
+            try:
+                self._synthesize(text)
+            except Exception as e:
+                logger.warning(f"TTS prewarm failed: {e}")
+                return
+        logger.info(f"Prewarmed {len(texts)} TTS prompt(s)")
     
     def _check_dependencies(self):
-        """Check if required TTS libraries are available."""
-        try:
-            import pyttsx3
-            self.has_pyttsx3 = True
-        except ImportError:
-            logger.warning("pyttsx3 not installed. Offline TTS disabled.")
+        """Check if the selected engine's TTS libraries are available."""
+        if self.engine_type == 'pyttsx3':
+            try:
+                import pyttsx3
+                self.has_pyttsx3 = True
+            except ImportError:
+                logger.warning("pyttsx3 not installed. Offline TTS disabled.")
         
-        try:
-            from gtts import gTTS
-            self.has_gtts = True
-        except ImportError:
-            logger.warning("gTTS not installed. Online TTS disabled.")
+        elif self.engine_type == 'piper':
+            try:
+                from piper import PiperVoice
+                import sounddevice
+                self.has_piper = True
+            except ImportError:
+                logger.warning("piper-tts or sounddevice not installed. Piper TTS disabled.")
+        
+        elif self.engine_type == 'gtts':
+            if gTTS is not None:
+                self.has_gtts = True
+            else:
+                logger.warning("gTTS not installed. Online TTS disabled.")
     
     def _initialize_engine(self):
         """Initialize the selected TTS engine."""
         if self.engine_type == 'pyttsx3' and self.has_pyttsx3:
-            import pyttsx3
-            self.tts_engine = pyttsx3.init()
-            
-            # Configure voice properties
-            self.tts_engine.setProperty('rate', 150)  # Speed of speech
-            self.tts_engine.setProperty('volume', 0.9)  # Volume (0.0 to 1.0)
+            # The engine lives on its own thread, shared by every pyttsx3 TTSService
+            self._engine_worker = _get_engine_worker()
+            self.tts_engine = self._engine_worker.engine
             
             # Try to set a pleasant voice
-            voices = self.tts_engine.getProperty('voices')
-            if voices:
-                # Prefer female voice if available (usually more pleasant)
-                for voice in voices:
-                    if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
-                        self.tts_engine.setProperty('voice', voice.id)
-                        break
+            if TTSService._cached_voice_id is None:
+                TTSService._cached_voice_id = self._engine_worker.submit(_find_preferred_voice).result()
+            self.engine_properties['voice'] = TTSService._cached_voice_id
             
             logger.info("pyttsx3 TTS engine initialized")
             
+        elif self.engine_type == 'piper' and self.has_piper:
+            from piper import PiperVoice
+            
+            if not self.piper_voice_path.exists():
+                raise RuntimeError(f"Piper voice model not found: {self.piper_voice_path}")
+            
+            # ONNX Runtime inference on CPU; synthesis runs in-process without a platform driver
+            self.piper_voice = PiperVoice.load(str(self.piper_voice_path))
+            logger.info(f"Piper TTS engine initialized ({self.piper_voice_path.name})")
+            
         elif self.engine_type == 'gtts' and self.has_gtts:
             logger.info("gTTS engine selected (requires internet)")
         else:
             logger.error(f"TTS engine '{self.engine_type}' not available")
-            raise RuntimeError(f"TTS engine '{self.engine_type}' not available. Install with: pip install {self.engine_type}")
+            package = 'piper-tts sounddevice' if self.engine_type == 'piper' else self.engine_type
+            raise RuntimeError(f"TTS engine '{self.engine_type}' not available. Install with: pip install {package}")
+    
+    def _run_on_engine(self, fn) -> Future:
+        """Run fn(engine) on the pyttsx3 engine thread with this service's voice settings."""
+        properties = dict(self.engine_properties)
+        
+        def job(engine):
+            for name, value in properties.items():
+                engine.setProperty(name, value)
+            return fn(engine)
+        
+        return self._engine_worker.submit(job)
+    
+    def _speak_on_engine(self, texts: List[str]) -> Future:
+        """Speak texts on the pyttsx3 engine thread, tracked so interrupt() stops only this service's speech."""
+        future = self._run_on_engine(lambda engine: _say_all(engine, texts))
+        self._speech_jobs.add(future)
+        future.add_done_callback(self._speech_jobs.discard)
+        return future
     
     def speak(self, text: str, wait: bool = True) -> bool:
         """
@@ -81,7 +201,7 @@ class TTSService:
         
         Args:
             text: Text to speak
-            wait: Whether to wait for speech to complete (pyttsx3 only)
+            wait: Whether to wait for speech to complete
             
         Returns:
             True if successful, False otherwise
@@ -90,38 +210,44 @@ class TTSService:
             logger.warning("Empty text provided for TTS")
             return False
         
+        # Multi-sentence text starts playing after the first sentence instead of the whole text
+        if wait and self.engine_type in ('piper', 'gtts') and _SENTENCE_SPLIT_RE.search(text.strip()):
+            return self.speak_streaming(text)
+        
         try:
             if self.engine_type == 'pyttsx3' and self.tts_engine:
-                self.tts_engine.say(text)
+                # Without wait, the engine thread speaks while the caller carries on
+                done = self._speak_on_engine([text])
                 if wait:
-                    self.tts_engine.runAndWait()
+                    try:
+                        done.result()
+                    except (_EngineStopped, CancelledError):
+                        logger.info("Speech interrupted")
+                        return True
                 logger.info(f"Spoke text: {text[:50]}...")
                 return True
             
-            elif self.engine_type == 'gtts' and self.has_gtts:
-                from gtts import gTTS
-                import pygame
+            elif self.engine_type == 'piper' and self.piper_voice:
+                import sounddevice as sd
                 
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as fp:
-                    temp_file = fp.name
+                sd.play(_wav_samples(self._synthesize(text)), self.piper_voice.config.sample_rate)
+                if wait:
+                    sd.wait()
                 
-                # Generate speech
-                tts = gTTS(text=text, lang='en', slow=False)
-                tts.save(temp_file)
+                logger.info(f"Spoke text: {text[:50]}...")
+                return True
+            
+            elif self.engine_type == 'gtts' and self.has_gtts:
+                # Generate speech (or reuse a cached MP3)
+                audio = self._synthesize(text)
                 
                 # Play audio
-                pygame.mixer.init()
-                pygame.mixer.music.load(temp_file)
+                self._ensure_mixer()
+                pygame.mixer.music.load(io.BytesIO(audio), 'mp3')
                 pygame.mixer.music.play()
                 
                 if wait:
-                    while pygame.mixer.music.get_busy():
-                        pygame.time.Clock().tick(10)
-                
-                # Cleanup
-                pygame.mixer.quit()
-                Path(temp_file).unlink()
+                    _wait_for_music()
                 
                 logger.info(f"Spoke text: {text[:50]}...")
                 return True
@@ -134,6 +260,261 @@ class TTSService:
             logger.error(f"TTS error: {e}")
             return False
     
+    def speak_streaming(self, text: str) -> bool:
+        """
+        Speak long text sentence by sentence, synthesizing the next sentence
+        while the current one plays, so audio starts after one sentence.
+        
+        Args:
+            text: Text to speak
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not text or not text.strip():
+            logger.warning("Empty text provided for TTS")
+            return False
+        
+        if self.engine_type == 'pyttsx3':
+            # pyttsx3 already streams queued utterances through the platform driver
+            return self.speak(text, wait=True)
+        
+        return self._speak_sentences(_split_sentences(text))
+    
+    def speak_many(self, texts: List[str]) -> bool:
+        """
+        Speak several texts back to back in one pass: pyttsx3 queues them all
+        for a single runAndWait(), Piper and gTTS pipeline them sentence by sentence.
+        
+        Args:
+            texts: Texts to speak, in order
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        texts = [text for text in texts if text and text.strip()]
+        if not texts:
+            logger.warning("Empty text provided for TTS")
+            return False
+        
+        if self.engine_type != 'pyttsx3':
+            return self._speak_sentences([sentence for text in texts for sentence in _split_sentences(text)])
+        
+        if not self.tts_engine:
+            logger.error("No TTS engine available")
+            return False
+        
+        try:
+            self._speak_on_engine(texts).result()
+            logger.info(f"Spoke {len(texts)} texts")
+            return True
+            
+        except (_EngineStopped, CancelledError):
+            logger.info("Speech interrupted")
+            return True
+            
+        except Exception as e:
+            logger.error(f"TTS error: {e}")
+            return False
+    
+    def _speak_sentences(self, sentences: List[str]) -> bool:
+        """Play sentences in order, synthesizing upcoming ones while the current one plays (Piper and gTTS)."""
+        self._interrupted.clear()
+        
+        # Piper synthesis is CPU-bound, so it stays one sentence ahead
+        lookahead = GTTS_LOOKAHEAD if self.engine_type == 'gtts' else 1
+        executor = ThreadPoolExecutor(max_workers=lookahead)
+        
+        try:
+            if self.engine_type == 'gtts':
+                self._ensure_mixer()
+            
+            pending = deque(executor.submit(self._synthesize, sentence) for sentence in sentences[:lookahead])
+            upcoming = iter(sentences[lookahead:])
+            while pending and not self._interrupted.is_set():
+                audio = pending.popleft().result()
+                next_sentence = next(upcoming, None)
+                if next_sentence is not None:
+                    pending.append(executor.submit(self._synthesize, next_sentence))
+                if not self._interrupted.is_set():
+                    self._play(audio)
+            
+            if self._interrupted.is_set():
+                logger.info(f"Speech interrupted: {sentences[0][:50]}...")
+            else:
+                logger.info(f"Spoke {len(sentences)} sentences: {sentences[0][:50]}...")
+            return True
+            
+        except Exception as e:
+            logger.error(f"TTS error: {e}")
+            return False
+        finally:
+            # After an interrupt, queued sentences are dropped and an in-flight one
+            # finishes in the background (into the cache) without holding up the caller
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def interrupt(self):
+        """
+        Stop speech immediately (e.g. when the candidate starts talking):
+        stops playback and skips sentences that have not started yet.
+        """
+        self._interrupted.set()
+        
+        try:
+            if self.engine_type == 'pyttsx3' and self.tts_engine:
+                for job in list(self._speech_jobs):
+                    self._engine_worker.request_stop(job)
+            elif self.engine_type == 'piper' and self.piper_voice:
+                import sounddevice as sd
+                sd.stop()
+            elif self.engine_type == 'gtts' and pygame is not None and pygame.mixer.get_init():
+                pygame.mixer.music.stop()
+            logger.info("TTS interrupted")
+        except Exception as e:
+            logger.error(f"Error interrupting TTS: {e}")
+    
+    def _ensure_mixer(self):
+        """Open the pygame mixer on first playback and keep it open for later utterances."""
+        if pygame is None:
+            raise RuntimeError("pygame is required for gTTS playback. Install with: pip install pygame")
+        
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(frequency=MIXER_FREQUENCY, buffer=MIXER_BUFFER)
+    
+    def close(self):
+        """Release the audio device held open for gTTS playback."""
+        if self.engine_type == 'gtts' and pygame is not None and pygame.mixer.get_init():
+            pygame.mixer.quit()
+    
+    def _synthesize(self, text: str) -> bytes:
+        """Synthesize text without playing it (Piper: WAV bytes, gTTS: MP3 bytes), using the cache."""
+        cache_file = self._cache_file(text)
+        if cache_file.exists():
+            # Mark as recently used for eviction
+            os.utime(cache_file)
+            return _read_cached_audio(str(cache_file))
+        
+        audio = self._render_audio(text)
+        if not audio:
+            raise RuntimeError("TTS engine produced no audio")
+        
+        # Write then rename, so concurrent readers never see a partial file
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, prefix='.', suffix=cache_file.suffix, delete=False) as fp:
+            fp.write(audio)
+        os.replace(fp.name, cache_file)
+        self._prune_cache()
+        
+        return audio
+    
+    def _prune_cache(self):
+        """Delete least recently used cache files until the cache fits TTS_CACHE_MAX_BYTES."""
+        entries = []
+        now = time.time()
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Removed by another writer
+                if entry.name.startswith('.'):
+                    # Partial file: being written now, or left behind by a crash
+                    if now - stat.st_mtime > _PARTIAL_MAX_AGE:
+                        Path(entry.path).unlink(missing_ok=True)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= TTS_CACHE_MAX_BYTES:
+                break
+            Path(path).unlink(missing_ok=True)
+            total -= size
+    
+    def _cache_file(self, text: str) -> Path:
+        """Cache file for text spoken with the current engine and voice settings."""
+        settings = f"{self.engine_type}|{self._voice_id()}|{self._rate()}|{self._volume()}|{text}"
+        key = hashlib.blake2b(settings.encode('utf-8'), digest_size=16).hexdigest()
+        return self.cache_dir / f"{key}{'.mp3' if self.engine_type == 'gtts' else '.wav'}"
+    
+    def _render_audio(self, text: str) -> bytes:
+        """Synthesize text to encoded audio bytes with the selected engine."""
+        if self.engine_type == 'pyttsx3' and self.tts_engine:
+            # pyttsx3 drivers can only write to a file
+            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as fp:
+                temp_file = Path(fp.name)
+            try:
+                self._run_on_engine(lambda engine: _save_all(engine, [(text, temp_file)])).result()
+                audio = temp_file.read_bytes()
+                if not _is_audio_file(audio):
+                    raise RuntimeError("pyttsx3 produced no audio")
+                return audio
+            finally:
+                temp_file.unlink(missing_ok=True)
+        
+        buffer = io.BytesIO()
+        
+        if self.engine_type == 'piper' and self.piper_voice:
+            import numpy as np
+            
+            samples = np.frombuffer(b''.join(
+                chunk.audio_int16_bytes
+                for chunk in self.piper_voice.synthesize(text, self._piper_config())
+            ), dtype=np.int16)
+            
+            # Header is sized up front, so the frames go out in one write with no header patch
+            with wave.open(buffer, 'wb') as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(self.piper_voice.config.sample_rate)
+                wav_file.setnframes(len(samples))
+                wav_file.writeframesraw(samples.tobytes())
+        
+        elif self.engine_type == 'gtts' and self.has_gtts:
+            # 'en' is always valid, so skip gTTS's per-call language table lookup
+            gTTS(text=text, lang='en', slow=False, lang_check=False).write_to_fp(buffer)
+        
+        else:
+            raise RuntimeError("No TTS engine available")
+        
+        return buffer.getvalue()
+    
+    def _voice_id(self) -> str:
+        """Identify the current voice, for cache keys."""
+        if self.engine_type == 'pyttsx3' and self.tts_engine:
+            return str(self.engine_properties['voice'])
+        if self.engine_type == 'piper':
+            return str(self.piper_voice_path)
+        return 'en'
+    
+    def _rate(self):
+        """Current speech rate, for cache keys."""
+        if self.engine_type == 'pyttsx3' and self.tts_engine:
+            return self.engine_properties['rate']
+        return self.piper_rate
+    
+    def _volume(self):
+        """Current speech volume, for cache keys."""
+        if self.engine_type == 'pyttsx3' and self.tts_engine:
+            return self.engine_properties['volume']
+        return self.piper_volume
+    
+    def _play(self, audio: bytes):
+        """Play audio from _synthesize() and wait for it to finish."""
+        if self.engine_type == 'piper':
+            import sounddevice as sd
+            
+            sd.play(_wav_samples(audio), self.piper_voice.config.sample_rate)
+            sd.wait()
+            return
+        
+        pygame.mixer.music.load(io.BytesIO(audio), 'mp3')
+        pygame.mixer.music.play()
+        _wait_for_music()
+        pygame.mixer.music.unload()
+    
     def save_to_file(self, text: str, output_path: str) -> bool:
         """
         Save speech to an audio file.
@@ -148,16 +529,11 @@ class TTSService:
         try:
             output_path = Path(output_path)
             
-            if self.engine_type == 'pyttsx3' and self.tts_engine:
-                self.tts_engine.save_to_file(text, str(output_path))
-                self.tts_engine.runAndWait()
-                logger.info(f"Saved TTS to: {output_path}")
-                return True
-            
-            elif self.engine_type == 'gtts' and self.has_gtts:
-                from gtts import gTTS
-                tts = gTTS(text=text, lang='en', slow=False)
-                tts.save(str(output_path))
+            if (self.engine_type == 'pyttsx3' and self.tts_engine) or \
+                    (self.engine_type == 'piper' and self.piper_voice) or \
+                    (self.engine_type == 'gtts' and self.has_gtts):
+                # Repeated prompts come from the cache instead of being synthesized again
+                output_path.write_bytes(self._synthesize(text))
                 logger.info(f"Saved TTS to: {output_path}")
                 return True
             
@@ -169,32 +545,346 @@ class TTSService:
             logger.error(f"Error saving TTS file: {e}")
             return False
     
+    def save_many(self, texts: List[str], output_dir: str) -> List[Path]:
+        """
+        Save several texts to audio files. pyttsx3 synthesizes every uncached text
+        in a single runAndWait(); gTTS requests run concurrently.
+        
+        Args:
+            texts: Texts to convert to speech
+            output_dir: Directory for the audio files (tts_000.wav, tts_001.wav, ...)
+            
+        Returns:
+            Paths of the saved files, in the order of texts (empty on failure)
+        """
+        try:
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            
+            audios = self._synthesize_many(texts)
+            
+            suffix = '.mp3' if self.engine_type == 'gtts' else '.wav'
+            output_paths = []
+            for i, audio in enumerate(audios):
+                output_path = output_dir / f"tts_{i:03d}{suffix}"
+                output_path.write_bytes(audio)
+                output_paths.append(output_path)
+            
+            logger.info(f"Saved {len(output_paths)} TTS files to: {output_dir}")
+            return output_paths
+            
+        except Exception as e:
+            logger.error(f"Error saving TTS files: {e}")
+            return []
+    
+    def submit(self, text: str) -> Future:
+        """
+        Queue text for synthesis on the service's background worker without blocking.
+        Requests queued together are synthesized as one batch (see save_many()).
+        
+        Args:
+            text: Text to convert to speech
+            
+        Returns:
+            Future resolving to the encoded audio bytes (WAV, or MP3 for gTTS)
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = _TTSPool(self)
+        return self._pool.submit(text)
+    
+    def _synthesize_many(self, texts: List[str]) -> List[bytes]:
+        """Synthesize several texts through the cache, batching engine work."""
+        if self.engine_type == 'pyttsx3' and self.tts_engine:
+            self._render_many_pyttsx3(texts)
+        elif not ((self.engine_type == 'piper' and self.piper_voice) or
+                  (self.engine_type == 'gtts' and self.has_gtts)):
+            raise RuntimeError("No TTS engine available")
+        
+        workers = GTTS_LOOKAHEAD if self.engine_type == 'gtts' else 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._synthesize, texts))
+    
+    def _render_many_pyttsx3(self, texts: List[str]):
+        """Synthesize uncached texts into the cache with one pyttsx3 run."""
+        pending = {}
+        for text in texts:
+            cache_file = self._cache_file(text)
+            if not cache_file.exists() and cache_file not in pending:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(dir=self.cache_dir, prefix='.', suffix='.wav', delete=False) as fp:
+                    pending[cache_file] = (text, Path(fp.name))
+        
+        if not pending:
+            return
+        
+        try:
+            self._run_on_engine(lambda engine: _save_all(engine, pending.values())).result()
+            for cache_file, (_, temp_file) in pending.items():
+                # Files the driver left empty are not cached; _synthesize() retries them one by one
+                with open(temp_file, 'rb') as f:
+                    if _is_audio_file(f.read(_AUDIO_HEADER_SIZE + 1)):
+                        os.replace(temp_file, cache_file)
+            self._prune_cache()
+        finally:
+            for _, temp_file in pending.values():
+                temp_file.unlink(missing_ok=True)
+    
+    def _piper_config(self):
+        """Build Piper synthesis settings from the current rate and volume."""
+        from piper import SynthesisConfig
+        
+        # Piper controls speed through phoneme duration, the inverse of words per minute
+        return SynthesisConfig(length_scale=DEFAULT_RATE / self.piper_rate, volume=self.piper_volume)
+    
     def set_rate(self, rate: int):
-        """Set speech rate (pyttsx3 only)."""
+        """Set speech rate in words per minute (pyttsx3 and Piper)."""
         if self.engine_type == 'pyttsx3' and self.tts_engine:
-            self.tts_engine.setProperty('rate', rate)
+            self.engine_properties['rate'] = rate
+            logger.info(f"Speech rate set to: {rate}")
+        elif self.engine_type == 'piper' and self.piper_voice:
+            self.piper_rate = max(1, rate)
             logger.info(f"Speech rate set to: {rate}")
     
     def set_volume(self, volume: float):
-        """Set speech volume 0.0 to 1.0 (pyttsx3 only)."""
+        """Set speech volume 0.0 to 1.0 (pyttsx3 and Piper)."""
         if self.engine_type == 'pyttsx3' and self.tts_engine:
-            self.tts_engine.setProperty('volume', max(0.0, min(1.0, volume)))
+            self.engine_properties['volume'] = max(0.0, min(1.0, volume))
+            logger.info(f"Speech volume set to: {volume}")
+        elif self.engine_type == 'piper' and self.piper_voice:
+            self.piper_volume = max(0.0, min(1.0, volume))
             logger.info(f"Speech volume set to: {volume}")
     
     def get_voices(self) -> list:
         """Get available voices (pyttsx3 only)."""
         if self.engine_type == 'pyttsx3' and self.tts_engine:
-            voices = self.tts_engine.getProperty('voices')
+            voices = self._engine_worker.submit(lambda engine: engine.getProperty('voices')).result()
             return [{'id': v.id, 'name': v.name, 'languages': v.languages} for v in voices]
         return []
     
     def set_voice(self, voice_id: str):
         """Set voice by ID (pyttsx3 only)."""
         if self.engine_type == 'pyttsx3' and self.tts_engine:
-            self.tts_engine.setProperty('voice', voice_id)
+            self.engine_properties['voice'] = voice_id
             logger.info(f"Voice set to: {voice_id}")
 
 
+class _EngineStopped(RuntimeError):
+    """An engine call was stopped part-way by _EngineWorker.request_stop()."""
+
+
+class _EngineWorker(threading.Thread):
+    """
+    Thread that owns the process's pyttsx3 engine. pyttsx3 engines are not
+    thread-safe and runAndWait() blocks, so every engine call is queued here,
+    including stop(), which runs from the engine's word callback.
+    """
+    
+    def __init__(self):
+        super().__init__(name="pyttsx3-engine", daemon=True)
+        self._in_q: "queue.Queue[tuple]" = queue.Queue()
+        self._engine_ready = Future()
+        self._lock = threading.Lock()
+        self._current: Optional[Future] = None  # Future of the running call
+        self._stop_job: Optional[Future] = None  # Call asked to stop, if it is the running one
+        self._stop_delivered = False  # engine.stop() was called during the running call
+        self.start()
+    
+    @property
+    def engine(self):
+        """The pyttsx3 engine, once created (raises if pyttsx3 failed to initialize)."""
+        return self._engine_ready.result()
+    
+    def submit(self, fn) -> Future:
+        """Queue fn(engine) and return a Future for its result."""
+        future = Future()
+        self._in_q.put((fn, future))
+        return future
+    
+    def request_stop(self, future: Future):
+        """
+        Stop one submitted call: drop it if still queued, or stop it at the next
+        word if running (its future then raises _EngineStopped). Other calls,
+        including other services' speech and cache renders, are not affected.
+        """
+        with self._lock:
+            if not future.cancel() and future is self._current:
+                self._stop_job = future
+    
+    def run(self):
+        """Create the engine, then run queued calls in order."""
+        try:
+            import pyttsx3
+            engine = pyttsx3.init()
+        except Exception as e:
+            self._engine_ready.set_exception(e)
+            return
+        
+        # pyttsx3 only supports stop() from its own callbacks while runAndWait() is running
+        def on_word(name, location, length):
+            with self._lock:
+                if self._stop_job is None or self._stop_job is not self._current:
+                    return
+                self._stop_delivered = True
+            engine.stop()
+        
+        engine.connect('started-word', on_word)
+        self._engine_ready.set_result(engine)
+        
+        while True:
+            fn, future = self._in_q.get()
+            with self._lock:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._current = future
+            try:
+                result = fn(engine)
+            except Exception as e:
+                result, error = None, e
+            else:
+                error = None
+            
+            with self._lock:
+                # A stopped call's output (e.g. a saved file) may be truncated, so never report success
+                if self._stop_delivered and error is None:
+                    error = _EngineStopped("Engine call stopped")
+                self._current = self._stop_job = None
+                self._stop_delivered = False
+            
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+_engine_worker: Optional[_EngineWorker] = None
+_engine_worker_lock = threading.Lock()
+
+
+def _get_engine_worker() -> _EngineWorker:
+    """Get or create the shared pyttsx3 engine thread"""
+    global _engine_worker
+    with _engine_worker_lock:
+        if _engine_worker is None:
+            _engine_worker = _EngineWorker()
+    return _engine_worker
+
+
+def _find_preferred_voice(engine) -> str:
+    """Return the first preferred pyttsx3 voice, or the engine's default voice."""
+    for voice in engine.getProperty('voices') or []:
+        # Prefer female voice if available
+        name = voice.name.casefold()
+        if any(key in name for key in PREFERRED_VOICE_KEYS):
+            return voice.id
+    return engine.getProperty('voice')
+
+
+def _say_all(engine, texts: List[str]):
+    """Speak texts in one pyttsx3 run."""
+    for text in texts:
+        engine.say(text)
+    engine.runAndWait()
+
+
+def _save_all(engine, jobs):
+    """Save (text, path) pairs to audio files in one pyttsx3 run."""
+    for text, path in jobs:
+        engine.save_to_file(text, str(path))
+    engine.runAndWait()
+
+
+class _TTSPool:
+    """
+    Background worker for one TTSService. Requests submitted while a batch is
+    being synthesized wait at most for that batch, then go out together in the
+    next one (a single pyttsx3 run, or concurrent gTTS requests).
+    """
+    
+    def __init__(self, service: TTSService, max_batch: int = 16):
+        """
+        Args:
+            service: Service whose engine synthesizes the requests
+            max_batch: Maximum number of texts per batch
+        """
+        self.service = service
+        self.max_batch = max_batch
+        self._in_q: "queue.Queue[tuple]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+        self._thread.start()
+    
+    def submit(self, text: str) -> Future:
+        """Queue a text and return a Future for its audio bytes."""
+        future = Future()
+        self._in_q.put((text, future))
+        return future
+    
+    def _next_batch(self) -> list:
+        """Block for one request, then take whatever else is already queued."""
+        batch = [self._in_q.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._in_q.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _run(self):
+        """Worker loop."""
+        while True:
+            # Drop requests whose callers cancelled them while queued
+            batch = [(text, future) for text, future in self._next_batch()
+                     if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            
+            try:
+                audios = self.service._synthesize_many([text for text, _ in batch])
+            except Exception as e:
+                logger.error(f"Error in batched TTS synthesis: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (_, future), audio in zip(batch, audios):
+                future.set_result(audio)
+
+
+def _wait_for_music():
+    """Block until pygame music playback finishes."""
+    while pygame.mixer.music.get_busy():
+        # Sleeps without allocating a Clock; ends at most MUSIC_POLL_MS after the audio does
+        pygame.time.wait(MUSIC_POLL_MS)
+
+
+def _split_sentences(text: str) -> List[str]:
+    """Split text into sentences for streaming."""
+    return [sentence for sentence in _SENTENCE_SPLIT_RE.split(text.strip()) if sentence]
+
+
+# WAV (and AIFF) header size; pyttsx3 output must be longer to hold any audio
+_AUDIO_HEADER_SIZE = 44
+
+
+def _is_audio_file(data: bytes) -> bool:
+    """Whether pyttsx3 output starts with a WAV/AIFF header followed by data (not empty or truncated)."""
+    return len(data) > _AUDIO_HEADER_SIZE and data[:4] in (b'RIFF', b'FORM')
+
+
+@lru_cache(maxsize=_AUDIO_CACHE_SIZE)
+def _read_cached_audio(path: str) -> bytes:
+    """Read a cache file, keeping recently used audio in memory."""
+    return Path(path).read_bytes()
+
+
+def _wav_samples(wav_bytes: bytes):
+    """Decode 16-bit mono WAV bytes to an int16 numpy array."""
+    import numpy as np
+    
+    with wave.open(io.BytesIO(wav_bytes), 'rb') as wav_file:
+        return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype=np.int16)
+
+
 # Standalone testing function
 def test_tts_service():
     """Test the TTS service."""